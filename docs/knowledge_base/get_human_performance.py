@@ -17,11 +17,27 @@ NOTA: Este script é legado. O fluxo atual carrega protocolos XML via VectorStor
       Use este script apenas se precisar analisar performance de datasets históricos.
 """
 
-import json
 from pathlib import Path
 
+import ijson
+import numpy as np
+import orjson
 from sklearn.metrics import accuracy_score, f1_score
 
+# Acima deste tamanho o arquivo é lido em streaming (ijson); abaixo, orjson é mais rápido
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+
+def iter_records(json_file: Path):
+    """Itera os registros (valores) do dicionário JSON {pmid: info}."""
+    if json_file.stat().st_size <= STREAMING_THRESHOLD_BYTES:
+        yield from orjson.loads(json_file.read_bytes()).values()
+    else:
+        with open(json_file, 'rb') as f:
+            for _, info in ijson.kvitems(f, ''):
+                yield info
+
+
 # Definir caminho correto (agora o script está na pasta de dados)
 data_path = Path("ori_pqal")
 test_set_file = data_path / "test_set.json"
@@ -29,18 +45,14 @@ test_set_file = data_path / "test_set.json"
 if not test_set_file.exists():
     raise FileNotFoundError(f"Arquivo não encontrado: {test_set_file}")
 
-test_set = json.load(open(test_set_file))
-
-labels = []
-r_free = []
-r_req = []
-
-for pmid, info in test_set.items():
-    labels.append(info['final_decision'])
-    r_free.append(info['reasoning_free_pred'])
-    r_req.append(info['reasoning_required_pred'])
+# Uma única passada: colunas (label, reasoning-free, reasoning-required)
+predictions = np.array([
+    (info['final_decision'], info['reasoning_free_pred'], info['reasoning_required_pred'])
+    for info in iter_records(test_set_file)
+])
+labels, r_free, r_req = predictions[:, 0], predictions[:, 1], predictions[:, 2]
 
-maj = ['yes' for _ in labels]
+maj = np.full_like(labels, 'yes')
 
 print('====Majority Performance====')
 
@@ -5,6 +5,7 @@ Configura Chroma com protocolos médicos internos.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 project_root = Path(__file__).parent
@@ -15,6 +16,19 @@ from src.infrastructure.vector_store import VectorStoreRepository
 from src.infrastructure.llm_factory import LLMFactory
 
 
+def _ping_llm():
+    """Testa a conexão com o Google Gemini."""
+    return LLMFactory.get_llm().invoke("Teste de conexão")
+
+
+def _smoke_test_retrieval(sync: bool = False):
+    """Inicializa o vectorstore (sincronizando, se pedido) e executa uma busca de teste."""
+    repository = VectorStoreRepository()
+    if sync:
+        repository.sync()
+    return repository.get_retriever().invoke("sepse em idosos")
+
+
 def main():
     print("🔧 Inicializando Sistema de Assistência Médica...\n")
     
@@ -25,22 +39,19 @@ def main():
             raise ValueError("GEMINI_API_KEY não configurada")
         print("✅ GEMINI_API_KEY encontrada\n")
         
-        # Testar LLM
+        # Testar LLM e vectorstore em paralelo (serviços independentes)
         print("🤖 Testando conexão com Google Gemini...")
-        llm = LLMFactory.get_llm()
-        test_response = llm.invoke("Teste de conexão")
-        print("✅ Conexão com Google Gemini estabelecida\n")
-        
-        # Inicializar vectorstore
-        print("📚 Inicializando Vectorstore...")
-        vector_repo = VectorStoreRepository()
-        retriever = vector_repo.get_retriever()
-        print("✅ Vectorstore inicializado com sucesso\n")
-        
-        # Teste de retrieval
-        print("🔍 Testando busca vetorial...")
-        test_docs = retriever.invoke("sepse em idosos")
-        print(f"✅ Teste OK: {len(test_docs)} documentos encontrados\n")
+        print("📚 Inicializando Vectorstore e testando busca vetorial...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            llm_future = executor.submit(_ping_llm)
+            retrieval_future = executor.submit(_smoke_test_retrieval, "--sync" in sys.argv)
+            
+            llm_future.result()
+            print("✅ Conexão com Google Gemini estabelecida\n")
+            
+            test_docs = retrieval_future.result()
+            print("✅ Vectorstore inicializado com sucesso")
+            print(f"✅ Teste OK: {len(test_docs)} documentos encontrados\n")
         
         print("=" * 60)
         print("✅ INICIALIZAÇÃO CONCLUÍDA COM SUCESSO!")
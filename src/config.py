@@ -2,9 +2,13 @@
 Módulo: src/config.py
 """
 from dotenv import load_dotenv
-from pydantic_settings import BaseSettings
+from functools import cached_property
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Literal
 import logging
+import os
 
 load_dotenv()
 
@@ -13,29 +17,50 @@ logger = logging.getLogger(__name__)
 class Settings(BaseSettings):
     """Configurações centralizadas da aplicação médica."""
     
+    # Imutável: lido uma vez na inicialização e compartilhado como singleton
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="forbid",
+        frozen=True,
+    )
+    
     # ===== LLM Configuration =====
     gemini_api_key: str              # Obrigatório (sem default)
     model_name: str = "gemini-2.0-flash"                  # Obrigatório (sem default)
     temperature: float = 0.0               # Obrigatório (sem default)
+    fused_preprocess: bool = True  # Idioma + tradução + guardrails em uma chamada ao LLM
+    parallel_guardrails: bool = True  # Guardrails ∥ busca (com fused_preprocess: perguntas em inglês); False = busca só após aprovação
+    
+    # ===== Embeddings =====
+    embedding_provider: Literal["google", "local"] = "google"  # local = sentence-transformers
+    local_embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     
     # ===== Vector Store Configuration (Chroma) =====
     vector_db_path: str = "data/chroma_db"
-    chunk_size: int = 1000
-    chunk_overlap: int = 200
+    vector_backend: Literal["chroma", "faiss"] = "chroma"  # Motor de busca (ingestão sempre no Chroma)
+    faiss_quantization: Literal["none", "fp16", "int8"] = "int8"  # Precisão dos vetores no FAISS
+    retrieval_k: int = 4             # Documentos retornados por busca
+    retrieval_score_threshold: float = 0.0  # Relevância mínima (0-1) na busca; 0 = desativado
+    multi_query_retrieval: bool = False  # Busca também com a pergunta original (não traduzida), em paralelo
+    chunk_size: int = 256            # Tamanho do chunk em tokens
+    chunk_overlap: int = 50          # Sobreposição em tokens
+    chunk_encoding: str = "cl100k_base"  # Tokenizador usado para medir os chunks
+    ingest_workers: int = Field(default_factory=lambda: max(1, (os.cpu_count() or 2) - 1))  # Processos de parsing na ingestão
+    embed_batch_size: int = 128      # Textos por requisição de embedding
+    embed_concurrency: int = 8       # Lotes de embedding simultâneos
     
     # ===== Knowledge Base =====
     docs_path: str = "docs/knowledge_base/7_SeniorHealth_QA"
+    anonymizer_workers: int = -1     # Processos do Presidio (-1 = todos os núcleos)
+    anonymizer_model: str = "pt_core_news_sm"  # Modelo spaCy do Presidio (ex: pt_core_news_lg)
     
     # ===== Cache Configuration =====
     redis_url: str = "redis://localhost:6379"
     cache_ttl: int = 3600
+    semantic_cache: bool = False     # Reaproveita resposta de pergunta quase idêntica (cosseno >= 0.98, mesmos números/siglas)
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
-        extra = "forbid"
-    
-    @property
+    @cached_property
     def docs_full_path(self) -> Path:
         """Retorna caminho completo para base de conhecimento com validação."""
         path = Path(self.docs_path).resolve()
@@ -45,7 +70,7 @@ class Settings(BaseSettings):
             path.mkdir(parents=True, exist_ok=True)
         return path
     
-    @property
+    @cached_property
     def vector_db_full_path(self) -> Path:
         """Retorna caminho completo para vector DB com criação automática."""
         path = Path(self.vector_db_path).resolve()
@@ -4,13 +4,31 @@ Usa LLM para análise semântica real da pergunta (não keywords).
 """
 
 import logging
+import threading
+from functools import cached_property
 from typing import Optional
+from cachetools import LRUCache, cached
 from pydantic import BaseModel, Field
 import re
 from src.infrastructure.llm_factory import LLMFactory
 
 logger = logging.getLogger(__name__)
 
+# Termos clínicos inequívocos (pt/en). Se a pergunta contém algum deles, é
+# médica sem precisar consultar o LLM; perguntas ambíguas seguem para o LLM.
+# Fora da lista por terem uso comum não clínico (signo, informática, metáfora):
+# câncer/cancer, tumor, avc/stroke, febre/fever, vacina/vaccine, infecção/infection,
+# sintoma, diagnóstico, doença, remédio, catarata/cataract (queda d'água), parkinson (lei de Parkinson)
+MEDICAL_KEYWORDS = frozenset({
+    "medicamento", "medicamentos", "medication", "medications",
+    "antibiótico", "antibióticos", "antibiotic", "antibiotics",
+    "sepse", "sepsis", "diabetes", "hipertensão", "hypertension",
+    "pneumonia", "infarto", "asma", "asthma", "alzheimer", "glaucoma",
+    "osteoporose", "osteoporosis", "artrite", "arthritis", "insulina", "insulin",
+})
+
+_WORD_RE = re.compile(r"\w+")
+
 
 class GuardrailsValidationResult(BaseModel):
     """Resultado da validação de guardrails."""
@@ -35,15 +53,45 @@ class GuardrailsValidator:
         "cnpj": r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}",
         "phone": r"(\+\d{1,3})?\s?\(?\d{2}\)?\s?\d{4,5}-?\d{4}",
         "email": r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}",
-        "patient_name": r"(?i)(paciente|patient|Sr\.|Dra?\.|Mrs?\.)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*",
+        # Repetição limitada de sobrenomes: evita backtracking em sequências longas
+        "patient_name": r"(?i:(?:paciente|patient|Sr\.|Dra?\.|Mrs?\.)\s+[A-Z][a-z]+(?:\s[A-Z][a-z]+){0,5})",
     }
     
+    # Todos os padrões unidos em uma única regex (uma só varredura do texto)
+    _PII_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in PII_PATTERNS.items()))
+    
+    # Máximo de perguntas com classificação do LLM mantidas em cache
+    RELEVANCE_CACHE_SIZE = 1024
+    
+    # Prompt simples e claro para o LLM
+    # Instruir para responder APENAS com "sim" ou "não"
+    RELEVANCE_PROMPT = """Analise a seguinte pergunta e responda APENAS com "sim" ou "não".
+
+A pergunta é sobre medicina, saúde, doenças, tratamentos, protocolos médicos, 
+diagnósticos, sintomas, medicamentos, cirurgias, ou tópicos clínicos similares?
+
+Pergunta: "{question}"
+
+Responda APENAS com "sim" ou "não":"""
+    
     def __init__(self):
         self.max_question_length = 500
         self.min_question_length = 5
-        self.llm = LLMFactory.get_llm()
-        # Cache simples para evitar chamar LLM repetidas vezes
-        self._cache = {}
+        # Cache LRU (limitado) para evitar chamar LLM repetidas vezes. Chave: pergunta
+        # normalizada; o LLM recebe o texto original (caixa distingue siglas, ex: AIDS)
+        self._relevance_cache: LRUCache = LRUCache(maxsize=self.RELEVANCE_CACHE_SIZE)
+        self._relevance_lock = threading.Lock()
+        self._classify_relevance = cached(
+            self._relevance_cache,
+            key=lambda question, normalized: normalized,
+            lock=self._relevance_lock,
+            info=True,
+        )(self._ask_llm_is_medical)
+    
+    @cached_property
+    def llm(self):
+        """LLM resolvido sob demanda (validações de comprimento/PII não precisam dele)."""
+        return LLMFactory.get_llm()
     
     def validate(self, question: str) -> bool:
         """
@@ -72,6 +120,29 @@ class GuardrailsValidator:
     def _run_validations(self, question: str) -> GuardrailsValidationResult:
         """Executa todas as validações em sequência."""
         
+        # Normaliza uma única vez; PII usa o texto original (padrões sensíveis a caixa)
+        normalized = question.strip().casefold()
+        
+        # Validações 1-2 e caminho rápido da 3 (sem LLM)
+        result = self.precheck(question, normalized)
+        if result is not None:
+            return result
+        
+        # Validação 3: Relevância Médica (precheck não decidiu: pergunta ambígua, LLM)
+        if not self._llm_relevance(question, normalized):
+            return self.not_medical_result()
+        
+        # Todas as validações passaram
+        return GuardrailsValidationResult(is_valid=True)
+    
+    def precheck(self, question: str, normalized: Optional[str] = None) -> Optional[GuardrailsValidationResult]:
+        """
+        WHEN [pergunta é recebida]
+        THE SYSTEM SHALL [aplicar as validações locais (comprimento, PII, termos clínicos)]
+        
+        Returns:
+            Resultado definitivo, ou None se a relevância médica depende do LLM
+        """
         # Validação 1: Comprimento
         if not self._validate_length(question):
             return GuardrailsValidationResult(
@@ -88,17 +159,26 @@ class GuardrailsValidator:
                 has_pii=True
             )
         
-        # Validação 3: Relevância Médica (usando LLM)
-        is_relevant = self._is_medically_relevant(question)
-        if not is_relevant:
-            return GuardrailsValidationResult(
-                is_valid=False,
-                reason="Pergunta não é sobre medicina ou saúde. Por favor, faça uma pergunta sobre saúde, doenças, tratamentos ou protocolos médicos.",
-                is_medical_relevant=False
-            )
+        # Validação 3 (caminho rápido): termo clínico inequívoco
+        if normalized is None:
+            normalized = question.strip().casefold()
+        if self._has_medical_keyword(normalized):
+            logger.debug("✅ Termo clínico reconhecido - análise LLM dispensada")
+            return GuardrailsValidationResult(is_valid=True)
         
-        # Todas as validações passaram
-        return GuardrailsValidationResult(is_valid=True)
+        return None
+    
+    @staticmethod
+    def not_medical_result() -> GuardrailsValidationResult:
+        return GuardrailsValidationResult(
+            is_valid=False,
+            reason="Pergunta não é sobre medicina ou saúde. Por favor, faça uma pergunta sobre saúde, doenças, tratamentos ou protocolos médicos.",
+            is_medical_relevant=False
+        )
+    
+    @staticmethod
+    def _has_medical_keyword(normalized: str) -> bool:
+        return not MEDICAL_KEYWORDS.isdisjoint(_WORD_RE.findall(normalized))
     
     def _validate_length(self, question: str) -> bool:
         """
@@ -121,16 +201,14 @@ class GuardrailsValidator:
         Returns:
             str: Tipo de PII detectado (ex: "cpf", "email") ou None
         """
-        text_lower = text.lower()
-        
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            if re.search(pattern, text):
-                logger.warning(f"🔐 PII detectado: {pii_type}")
-                return pii_type
+        match = self._PII_RE.search(text)
+        if match:
+            logger.warning(f"🔐 PII detectado: {match.lastgroup}")
+            return match.lastgroup
         
         return None
     
-    def _is_medically_relevant(self, question: str) -> bool:
+    def _is_medically_relevant(self, question: str, normalized: Optional[str] = None) -> bool:
         """
         WHEN [pergunta é recebida]
         THE SYSTEM SHALL [usar LLM para analisar se é pergunta médica]
@@ -139,48 +217,24 @@ class GuardrailsValidator:
         
         Args:
             question: Pergunta a validar
+            normalized: Pergunta já normalizada (strip + casefold), se disponível
             
         Returns:
             bool: True se é pergunta médica, False caso contrário
         """
-        # Verificar cache primeiro (para evitar múltiplas chamadas ao LLM)
-        cache_key = hash(question)
-        if cache_key in self._cache:
-            logger.debug(f"✅ Usando resposta em cache")
-            return self._cache[cache_key]
+        if normalized is None:
+            normalized = question.strip().casefold()
         
+        # Só o passo de termos clínicos do precheck (comprimento/PII não são relevância)
+        if self._has_medical_keyword(normalized):
+            return True
+        return self._llm_relevance(question, normalized)
+    
+    def _llm_relevance(self, question: str, normalized: str) -> bool:
+        """Classificação pelo LLM (cacheada); erros são permissivos e não entram no cache."""
         try:
-            logger.debug(f"🤖 Analisando pergunta com LLM...")
-            
-            # Prompt simples e claro para o LLM
-            # Instruir para responder APENAS com "sim" ou "não"
-            prompt = f"""Analise a seguinte pergunta e responda APENAS com "sim" ou "não".
-
-A pergunta é sobre medicina, saúde, doenças, tratamentos, protocolos médicos, 
-diagnósticos, sintomas, medicamentos, cirurgias, ou tópicos clínicos similares?
-
-Pergunta: "{question}"
-
-Responda APENAS com "sim" ou "não":"""
-            
-            response = self.llm.invoke(prompt)
-            response_text = response.content if hasattr(response, 'content') else str(response)
-            response_text = response_text.strip().lower()
-            
-            logger.debug(f"🤖 Resposta do LLM: {response_text}")
-            
-            # Analisar resposta
-            is_medical = "sim" in response_text or "yes" in response_text
-            
-            # Cachear resultado
-            self._cache[cache_key] = is_medical
-            
-            if is_medical:
-                logger.debug(f"✅ Pergunta reconhecida como médica")
-            else:
-                logger.debug(f"❌ Pergunta NÃO reconhecida como médica")
-            
-            return is_medical
+            # Chave normalizada aumenta a taxa de acerto; o prompt usa o texto original
+            return self._classify_relevance(question.strip(), normalized)
         
         except Exception as e:
             logger.error(f"❌ Erro ao analisar com LLM: {e}")
@@ -189,7 +243,33 @@ Responda APENAS com "sim" ou "não":"""
             logger.warning(f"⚠️ Erro na análise LLM - assumindo pergunta válida por segurança")
             return True
     
+    def _ask_llm_is_medical(self, question: str, normalized: str) -> bool:
+        """
+        Consulta o LLM sobre a relevância médica da pergunta.
+        
+        Chamado através de `_classify_relevance` (cache LRU com chave `normalized`);
+        exceções não são cacheadas e propagam para `_llm_relevance`.
+        """
+        logger.debug(f"🤖 Analisando pergunta com LLM...")
+        
+        response = self.llm.invoke(self.RELEVANCE_PROMPT.format(question=question))
+        response_text = response.content if hasattr(response, 'content') else str(response)
+        response_text = response_text.strip().lower()
+        
+        logger.debug(f"🤖 Resposta do LLM: {response_text}")
+        
+        # Analisar resposta
+        is_medical = "sim" in response_text or "yes" in response_text
+        
+        if is_medical:
+            logger.debug(f"✅ Pergunta reconhecida como médica")
+        else:
+            logger.debug(f"❌ Pergunta NÃO reconhecida como médica")
+        
+        return is_medical
+    
     def clear_cache(self):
         """Limpa cache de análises."""
-        self._cache.clear()
+        with self._relevance_lock:
+            self._relevance_cache.clear()
         logger.debug("🗑️ Cache de validação limpo")
\ No newline at end of file
@@ -7,10 +7,13 @@ Motivo da alteração: Correção de tipagem (documents) e inclusão de campos f
 from typing import TypedDict, List, Optional
 from langchain_core.documents import Document
 
-class AgentState(TypedDict):
+class AgentState(TypedDict, total=False):
     """
     Estado central da aplicação que flui através do grafo RAG.
     
+    Campos opcionais (total=False): cada nó devolve apenas as chaves que
+    altera e o LangGraph faz o merge, então o estado inicial pode ser parcial.
+    
     WHEN [pergunta médica é submetida]
     THE SYSTEM SHALL [manter estado consistente através de todos os nós]
     """
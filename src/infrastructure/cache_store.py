@@ -3,42 +3,248 @@ Cache de respostas e documentos recuperados.
 Melhora latência em perguntas frequentes.
 """
 
-import json
-from functools import lru_cache
-from typing import List, Dict, Tuple
-from hashlib import md5
+import fnmatch
+import logging
+import re
+import threading
+from collections import OrderedDict
+import faiss
+import numpy as np
+import orjson
+from cachetools import TTLCache
+from functools import cached_property, lru_cache
+from typing import List, Dict, Optional, Tuple
+from hashlib import blake2b
 import redis
 from langchain_core.documents import Document
 
+from src.config import settings
+from src.infrastructure.llm_factory import LLMFactory
+
+logger = logging.getLogger(__name__)
+
+HASH_CACHE_SIZE = 4096
+INVALIDATE_BATCH_SIZE = 500
+L1_CACHE_SIZE = 2048
+L1_CACHE_TTL = 300  # 5 minutos em memória; o Redis mantém o TTL completo
+SEMANTIC_CACHE_SIZE = 1024
+# Respostas médicas: só perguntas praticamente idênticas reaproveitam a resposta
+SEMANTIC_SIMILARITY_THRESHOLD = 0.98
+
+# Números (doses, idades) e siglas (ex: AIDS, IECA) precisam coincidir exatamente
+_FINGERPRINT_RE = re.compile(r"\d+(?:[.,]\d+)?|\b[A-Z]{2,}\b")
+
+
+@lru_cache(maxsize=HASH_CACHE_SIZE)
+def _hash_query(question: str) -> str:
+    """Gera hash determinístico da pergunta (BLAKE2b, 128 bits), memoizado."""
+    return blake2b(question.lower().encode(), digest_size=16).hexdigest()
+
+
+def _question_fingerprint(question: str) -> Tuple[str, ...]:
+    """Números e siglas da pergunta, que a similaridade de embeddings não distingue bem."""
+    return tuple(sorted(token.replace(",", ".") for token in _FINGERPRINT_RE.findall(question)))
+
+
+def _cache_key(question: str) -> str:
+    """Chave por (modelo, pergunta): trocar o LLM não reaproveita respostas antigas."""
+    return f"medical_response:{settings.model_name}:{_hash_query(question)}"
+
+
+class SemanticQueryIndex:
+    """
+    Índice FAISS de perguntas já respondidas, com despejo LRU.
+    
+    Vetores L2-normalizados + produto interno (IndexFlatIP) = similaridade de cosseno.
+    Cada pergunta guarda também sua impressão (números/siglas): acerto exige igualdade.
+    """
+    
+    def __init__(self, max_size: int = SEMANTIC_CACHE_SIZE):
+        self.max_size = max_size
+        self._index = None  # Criado no primeiro add (dimensão vem do modelo de embeddings)
+        self._keys: "OrderedDict[int, str]" = OrderedDict()  # id FAISS -> chave Redis (ordem LRU)
+        self._ids_by_key: Dict[str, int] = {}
+        self._fingerprints: Dict[str, Tuple[str, ...]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def search(self, vector: np.ndarray, fingerprint: Tuple[str, ...] = (),
+               threshold: float = SEMANTIC_SIMILARITY_THRESHOLD) -> Optional[str]:
+        """Retorna a chave da pergunta mais parecida se o cosseno for >= threshold e a impressão coincidir."""
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector, 1)
+            vector_id = int(ids[0][0])
+            if vector_id == -1 or scores[0][0] < threshold:
+                return None
+            cache_key = self._keys[vector_id]
+            if self._fingerprints.get(cache_key) != fingerprint:
+                return None
+            self._keys.move_to_end(vector_id)
+            return cache_key
+    
+    def add(self, vector: np.ndarray, cache_key: str, fingerprint: Tuple[str, ...] = ()) -> None:
+        """Registra o vetor da pergunta, despejando a menos usada se cheio."""
+        with self._lock:
+            if cache_key in self._ids_by_key:
+                self._keys.move_to_end(self._ids_by_key[cache_key])
+                return
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(vector.shape[1]))
+            
+            vector_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(vector, np.array([vector_id], dtype=np.int64))
+            self._keys[vector_id] = cache_key
+            self._ids_by_key[cache_key] = vector_id
+            self._fingerprints[cache_key] = fingerprint
+            
+            while len(self._keys) > self.max_size:
+                old_id, old_key = self._keys.popitem(last=False)
+                del self._ids_by_key[old_key]
+                del self._fingerprints[old_key]
+                self._index.remove_ids(np.array([old_id], dtype=np.int64))
+    
+    def remove(self, cache_key: str) -> None:
+        """Remove a pergunta do índice (ex: resposta expirou no Redis)."""
+        with self._lock:
+            vector_id = self._ids_by_key.pop(cache_key, None)
+            if vector_id is not None:
+                del self._keys[vector_id]
+                del self._fingerprints[cache_key]
+                self._index.remove_ids(np.array([vector_id], dtype=np.int64))
+    
+    def remove_matching(self, pattern: str) -> None:
+        """Remove as perguntas cujas chaves casam com o padrão glob (mesma sintaxe do SCAN)."""
+        with self._lock:
+            if self._index is None:
+                return
+            stale = [key for key in self._ids_by_key if fnmatch.fnmatchcase(key, pattern)]
+            stale_ids = [self._ids_by_key.pop(cache_key) for cache_key in stale]
+            for vector_id, cache_key in zip(stale_ids, stale):
+                del self._keys[vector_id]
+                del self._fingerprints[cache_key]
+            if stale_ids:
+                self._index.remove_ids(np.array(stale_ids, dtype=np.int64))
+    
+    def clear(self) -> None:
+        with self._lock:
+            if self._index is not None:
+                self._index.reset()
+            self._keys.clear()
+            self._ids_by_key.clear()
+            self._fingerprints.clear()
+
+
 class ResponseCache:
     """Cache distribuído para respostas médicas."""
     
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(self, redis_url: str = "redis://localhost:6379", semantic: bool = False):
         self.redis_client = redis.from_url(redis_url)
-        self.ttl = 3600  # 1 hora para respostas clínicas
+        self.ttl = settings.cache_ttl  # padrão: 1 hora para respostas clínicas
+        # L1 em processo na frente do Redis (evita ida à rede em perguntas repetidas)
+        self._l1: TTLCache = TTLCache(maxsize=L1_CACHE_SIZE, ttl=L1_CACHE_TTL)
+        self._l1_lock = threading.Lock()
+        # Cache semântico: perguntas reformuladas reaproveitam a resposta
+        self.semantic = semantic
+        self._semantic_index = SemanticQueryIndex()
+        self._embed_question = lru_cache(maxsize=SEMANTIC_CACHE_SIZE)(self._compute_question_vector)
     
-    def _hash_query(self, question: str) -> str:
-        """Gera hash determinístico da pergunta."""
-        return md5(question.lower().encode()).hexdigest()
+    @cached_property
+    def embeddings(self):
+        return LLMFactory.get_embeddings()
+    
+    def _compute_question_vector(self, normalized_question: str) -> np.ndarray:
+        """Embedding L2-normalizado da pergunta, no formato (1, dim) do FAISS."""
+        vector = np.array([self.embeddings.embed_query(normalized_question)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+    
+    def _question_vector(self, question: str) -> Optional[np.ndarray]:
+        try:
+            return self._embed_question(question.strip().lower())
+        except Exception as e:
+            logger.warning(f"⚠️ Cache semântico indisponível: {e}")
+            return None
+    
+    def _read(self, cache_key: str) -> Dict | None:
+        """Lê do L1 e, em seguida, do Redis (promovendo para o L1)."""
+        with self._l1_lock:
+            hit = self._l1.get(cache_key)
+        if hit is not None:
+            return hit
+        
+        cached = self.redis_client.get(cache_key)
+        if not cached:
+            return None
+        
+        cache_data = orjson.loads(cached)
+        with self._l1_lock:
+            self._l1[cache_key] = cache_data
+        return cache_data
+    
+    @staticmethod
+    def _to_response(cache_data: Dict | None) -> Dict | None:
+        """Reconstrói os Documents (o cache guarda apenas dicts serializáveis)."""
+        if cache_data is None:
+            return None
+        return {**cache_data, "documents": [Document(**doc) for doc in cache_data["documents"]]}
     
     def get_cached_response(self, question: str) -> Dict | None:
         """Recupera resposta em cache."""
-        cache_key = f"medical_response:{self._hash_query(question)}"
-        cached = self.redis_client.get(cache_key)
-        return json.loads(cached) if cached else None
+        cache_data = self._read(_cache_key(question))
+        if cache_data is not None or not self.semantic:
+            return self._to_response(cache_data)
+        
+        # Sem acerto exato: procura pergunta semanticamente equivalente
+        vector = self._question_vector(question)
+        if vector is None:
+            return None
+        similar_key = self._semantic_index.search(vector, _question_fingerprint(question))
+        if similar_key is None:
+            return None
+        
+        cache_data = self._read(similar_key)
+        if cache_data is None:
+            # Resposta expirou no Redis: remove do índice
+            self._semantic_index.remove(similar_key)
+        else:
+            logger.info("♻️ Resposta reaproveitada do cache semântico")
+        return self._to_response(cache_data)
     
-    def cache_response(self, question: str, documents: List[Document], generation: str) -> None:
-        """Armazena resposta em cache."""
-        cache_key = f"medical_response:{self._hash_query(question)}"
+    def cache_response(self, question: str, documents: List[Document], generation: str, **fields) -> None:
+        """Armazena resposta em cache (fields: demais chaves do estado final, ex: hallucination_check)."""
+        cache_key = _cache_key(question)
         cache_data = {
-            "documents": [d.page_content for d in documents],
-            "generation": generation
+            "documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in documents],
+            "generation": generation,
+            **fields,
         }
-        self.redis_client.setex(cache_key, self.ttl, json.dumps(cache_data))
+        self.redis_client.setex(cache_key, self.ttl, orjson.dumps(cache_data))
+        with self._l1_lock:
+            self._l1[cache_key] = cache_data
+        
+        if self.semantic:
+            vector = self._question_vector(question)
+            if vector is not None:
+                self._semantic_index.add(vector, cache_key, _question_fingerprint(question))
     
     def invalidate(self, pattern: str = "*") -> int:
-        """Invalida cache por padrão (ex: após atualização de protocolos)."""
-        keys = self.redis_client.keys(f"medical_response:{pattern}")
-        if keys:
-            return self.redis_client.delete(*keys)
-        return 0
\ No newline at end of file
+        """Invalida cache por padrão (ex: após atualização de protocolos); L1 e índice semântico seguem o mesmo filtro."""
+        full_pattern = f"medical_response:{pattern}"
+        # SCAN não bloqueia o Redis como KEYS; UNLINK libera a memória em background
+        pipe = self.redis_client.pipeline(transaction=False)
+        removed = 0
+        for key in self.redis_client.scan_iter(match=full_pattern, count=INVALIDATE_BATCH_SIZE):
+            pipe.unlink(key)
+            removed += 1
+            if removed % INVALIDATE_BATCH_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
+        
+        with self._l1_lock:
+            for cache_key in [key for key in self._l1 if fnmatch.fnmatchcase(key, full_pattern)]:
+                self._l1.pop(cache_key, None)
+        self._semantic_index.remove_matching(full_pattern)
+        return removed
\ No newline at end of file
@@ -1,60 +1,179 @@
 import logging
+import threading
+from typing import List, NamedTuple
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Consultas (perguntas) com embedding mantido em memória
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+
+class QueryCacheInfo(NamedTuple):
+    """Estatísticas do cache (mesmos campos de functools.lru_cache.cache_info)."""
+    
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    WHEN [a mesma consulta é vetorizada de novo (pergunta repetida, busca + validação)]
+    THE SYSTEM SHALL [reutilizar o vetor em memória em vez de chamar a API]
+    
+    Só embed_query/aembed_query passam pelo cache LRU (chave: texto com espaços
+    normalizados); embeddings de documentos vão direto ao modelo.
+    """
+    
+    def __init__(self, embeddings: Embeddings, maxsize: int = QUERY_EMBEDDING_CACHE_SIZE):
+        self.embeddings = embeddings
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._hits = self._misses = 0
+    
+    def __getattr__(self, name):
+        # Atributos específicos do modelo (ex: model, client) continuam acessíveis
+        if name == "embeddings":
+            raise AttributeError(name)  # ainda não inicializado (ex: cópia/pickle)
+        return getattr(self.embeddings, name)
+    
+    def _get(self, key: str):
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+            return vector
+    
+    def cache_info(self) -> QueryCacheInfo:
+        with self._lock:
+            return QueryCacheInfo(self._hits, self._misses, self._cache.maxsize, len(self._cache))
+    
+    def _put(self, key: str, vector: List[float]) -> List[float]:
+        with self._lock:
+            # Tupla: quem recebe a lista pode alterá-la sem corromper o cache
+            self._cache[key] = tuple(vector)
+        return vector
+    
+    def embed_query(self, text: str) -> List[float]:
+        key = " ".join(text.split())
+        hit = self._get(key)
+        if hit is not None:
+            return list(hit)
+        return self._put(key, self.embeddings.embed_query(key))
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        key = " ".join(text.split())
+        hit = self._get(key)
+        if hit is not None:
+            return list(hit)
+        return self._put(key, await self.embeddings.aembed_query(key))
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
 
 class LLMFactory:
     """Factory para criar instâncias de LLM e embeddings."""
     
     _llm_instance = None
     _embeddings_instance = None
+    # Evita que threads concorrentes criem clientes duplicados (cada um com seu pool HTTP)
+    _lock = threading.Lock()
     
     @classmethod
     def get_llm(cls) -> ChatGoogleGenerativeAI:
         """Retorna instância singleton do LLM."""
-        if cls._llm_instance is None:
-            logger.info(f"🤖 Inicializando {settings.model_name}...")
-            try:
-                cls._llm_instance = ChatGoogleGenerativeAI(
-                    model=settings.model_name,
-                    google_api_key=settings.gemini_api_key,
-                    temperature=settings.temperature,
-                    top_p=0.95,
-                    max_output_tokens=2048,
-                )
-                logger.info(f"✅ {settings.model_name} inicializado com sucesso")
-            except Exception as e:
-                logger.error(f"❌ Erro ao inicializar LLM: {e}")
-                logger.info(
-                    "💡 Dica: Verifique se o modelo está disponível executando:\n"
-                    "  .venv/bin/python -c "
-                    '"import google.genai as genai; [print(m.id) for m in genai.models.list()]"'
-                )
-                raise
+        with cls._lock:
+            if cls._llm_instance is None:
+                logger.info(f"🤖 Inicializando {settings.model_name}...")
+                try:
+                    cls._llm_instance = ChatGoogleGenerativeAI(
+                        model=settings.model_name,
+                        google_api_key=settings.gemini_api_key,
+                        temperature=settings.temperature,
+                        top_p=0.95,
+                        max_output_tokens=2048,
+                    )
+                    logger.info(f"✅ {settings.model_name} inicializado com sucesso")
+                except Exception as e:
+                    logger.error(f"❌ Erro ao inicializar LLM: {e}")
+                    logger.info(
+                        "💡 Dica: Verifique se o modelo está disponível executando:\n"
+                        "  .venv/bin/python -c "
+                        '"import google.genai as genai; [print(m.id) for m in genai.models.list()]"'
+                    )
+                    raise
         
         return cls._llm_instance
     
     @classmethod
-    def get_embeddings(cls) -> GoogleGenerativeAIEmbeddings:
+    def get_embeddings(cls) -> CachedQueryEmbeddings:
         """Retorna instância singleton de embeddings."""
-        if cls._embeddings_instance is None:
-            logger.info("📊 Inicializando embeddings...")
-            try:
-                cls._embeddings_instance = GoogleGenerativeAIEmbeddings(
-                    model="models/embedding-001",
-                    google_api_key=settings.gemini_api_key,
-                )
-                logger.info("✅ Embeddings inicializados com sucesso")
-            except Exception as e:
-                logger.error(f"❌ Erro ao inicializar embeddings: {e}")
-                raise
+        with cls._lock:
+            if cls._embeddings_instance is None:
+                logger.info(f"📊 Inicializando embeddings ({settings.embedding_provider})...")
+                try:
+                    cls._embeddings_instance = CachedQueryEmbeddings(cls._create_embeddings_model())
+                    logger.info("✅ Embeddings inicializados com sucesso")
+                except Exception as e:
+                    logger.error(f"❌ Erro ao inicializar embeddings: {e}")
+                    raise
         
         return cls._embeddings_instance
     
+    @classmethod
+    def create_ingestion_embeddings(cls) -> Embeddings:
+        """
+        WHEN [a ingestão vetoriza lotes dentro de um asyncio.run descartável]
+        THE SYSTEM SHALL [usar um cliente de embeddings próprio, sem compartilhar
+        com o event loop da CLI um pool async preso a um loop já fechado]
+        """
+        if settings.embedding_provider == "local":
+            # Sem cliente HTTP (aembed roda em executor): reaproveita o modelo já carregado
+            return cls.get_embeddings()
+        return cls._create_embeddings_model()
+    
+    @classmethod
+    def _create_embeddings_model(cls) -> Embeddings:
+        """Cria o modelo de embeddings configurado, sem cache nem compartilhamento."""
+        if settings.embedding_provider == "local":
+            return cls._create_local_embeddings()
+        return GoogleGenerativeAIEmbeddings(
+            model="models/embedding-001",
+            google_api_key=settings.gemini_api_key,
+        )
+    
+    @staticmethod
+    def _create_local_embeddings():
+        """
+        WHEN [EMBEDDING_PROVIDER=local]
+        THE SYSTEM SHALL [gerar embeddings localmente (sentence-transformers), sem
+        chamadas de rede nem cota da API, usando GPU quando disponível]
+        """
+        # Dependências opcionais: pip install ".[local]"
+        import torch
+        from langchain_huggingface import HuggingFaceEmbeddings
+        
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        return HuggingFaceEmbeddings(
+            model_name=settings.local_embedding_model,
+            model_kwargs={"device": device},
+            encode_kwargs={"batch_size": 64, "normalize_embeddings": True},
+        )
+    
     @classmethod
     def reset(cls):
         """Reseta instâncias (útil para testes)."""
-        cls._llm_instance = None
-        cls._embeddings_instance = None
\ No newline at end of file
+        with cls._lock:
+            cls._llm_instance = None
+            cls._embeddings_instance = None
\ No newline at end of file
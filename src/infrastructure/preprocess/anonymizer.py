@@ -3,41 +3,102 @@ Módulo de anonimização de documentos médicos.
 Pré-processa XMLs antes de ingestão no vectorstore.
 """
 
+import logging
 import re
-from typing import List
-from presidio_analyzer import AnalyzerEngine
+from functools import lru_cache
+from typing import List, Tuple
+from joblib import Parallel, delayed
+from presidio_analyzer import AnalyzerEngine, RecognizerResult
+from presidio_analyzer.nlp_engine import NlpEngineProvider
 from presidio_anonymizer import AnonymizerEngine
 
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Abaixo disso o custo de subir workers supera o ganho do paralelismo
+PARALLEL_MIN_BATCH = 32
+
+# Padrões brasileiros que o Presidio não cobre nativamente
+PII_PATTERNS = {
+    "CPF": r"\d{3}\.\d{3}\.\d{3}-\d{2}",
+    "CNPJ": r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}",
+    "PHONE": r"\(\d{2}\)\s?\d{4,5}-\d{4}",
+    "EMAIL": r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}",
+}
+
+# União com grupos nomeados: todos os padrões em uma única passada pelo texto
+_PII_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in PII_PATTERNS.items()))
+
+
+@lru_cache(maxsize=1)
+def _get_engines() -> Tuple[AnalyzerEngine, AnonymizerEngine]:
+    """Carrega os engines do Presidio uma vez por processo (modelo spaCy é pesado)."""
+    # Modelo spaCy CNN em português (sm por padrão; lg quando precisão importa)
+    provider = NlpEngineProvider(nlp_configuration={
+        "nlp_engine_name": "spacy",
+        "models": [{"lang_code": "pt", "model_name": settings.anonymizer_model}],
+    })
+    analyzer = AnalyzerEngine(nlp_engine=provider.create_engine(), supported_languages=["pt"])
+    return analyzer, AnonymizerEngine()
+
+
+def _find_pattern_pii(text: str) -> List[RecognizerResult]:
+    """Localiza CPF/CNPJ/telefone/e-mail com a regex unificada."""
+    return [
+        RecognizerResult(entity_type=match.lastgroup, start=match.start(), end=match.end(), score=1.0)
+        for match in _PII_RE.finditer(text)
+    ]
+
+
+def _anonymize_text(text: str) -> str:
+    """Anonymiza PII no texto; função de módulo para ser serializável nos workers."""
+    analyzer, anonymizer = _get_engines()
+    results = _find_pattern_pii(text)
+    
+    try:
+        # Presidio detecção automática (NER para nomes, locais, etc.)
+        results.extend(analyzer.analyze(text, language="pt"))
+    except Exception as e:
+        logger.warning(f"Erro no Presidio: {e}. Aplicando apenas padrões regex.")
+    
+    if not results:
+        return text
+    
+    try:
+        anonymized = anonymizer.anonymize(
+            text=text,
+            analyzer_results=results
+        )
+        return anonymized.text
+    except Exception as e:
+        logger.warning(f"Erro ao anonymizar: {e}. Usando texto original.")
+        return text
+
+
 class MedicalDataAnonymizer:
     """Anonymiza PII em documentos médicos usando Microsoft Presidio."""
     
     def __init__(self):
-        self.analyzer = AnalyzerEngine()
-        self.anonymizer = AnonymizerEngine()
-        self.pii_patterns = {
-            "CPF": r"\d{3}\.\d{3}\.\d{3}-\d{2}",
-            "CNPJ": r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}",
-            "PHONE": r"\(\d{2}\)\s?\d{4,5}-\d{4}",
-            "EMAIL": r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}",
-        }
+        self.pii_patterns = PII_PATTERNS
+    
+    @property
+    def analyzer(self) -> AnalyzerEngine:
+        return _get_engines()[0]
+    
+    @property
+    def anonymizer(self) -> AnonymizerEngine:
+        return _get_engines()[1]
     
     def anonymize_document(self, text: str) -> str:
         """Anonymiza PII no texto mantendo estrutura clínica."""
-        try:
-            # Presidio detecção automática
-            results = self.analyzer.analyze(text, language="pt")
-            
-            if results:
-                anonymized = self.anonymizer.anonymize(
-                    text=text,
-                    analyzer_results=results
-                )
-                return anonymized.text
-            return text
-        except Exception as e:
-            logger.warning(f"Erro ao anonymizar: {e}. Usando texto original.")
-            return text
+        return _anonymize_text(text)
     
     def anonymize_batch(self, documents: List[str]) -> List[str]:
-        """Processa lote de documentos."""
-        return [self.anonymize_document(doc) for doc in documents]
\ No newline at end of file
+        """Processa lote de documentos em paralelo (Presidio/spaCy é CPU-bound)."""
+        if len(documents) < PARALLEL_MIN_BATCH:
+            return [_anonymize_text(doc) for doc in documents]
+        
+        return Parallel(n_jobs=settings.anonymizer_workers, backend="loky")(
+            delayed(_anonymize_text)(doc) for doc in documents
+        )
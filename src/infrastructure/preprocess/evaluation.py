@@ -10,7 +10,7 @@ Exemplo:
     python src/infrastructure/preprocess/evaluation.py predictions.json
 """
 
-import json
+import orjson
 import sys
 from pathlib import Path
 
@@ -29,8 +29,8 @@ if not ground_truth_file.exists():
 if not pred_file.exists():
     raise FileNotFoundError(f"Predições não encontradas em: {pred_file}")
 
-ground_truth = json.load(open(ground_truth_file)) 
-predictions = json.load(open(pred_file))
+ground_truth = orjson.loads(ground_truth_file.read_bytes())
+predictions = orjson.loads(pred_file.read_bytes())
 
 assert set(ground_truth) == set(predictions), 'Please predict all and only the instances in the test set.'
 
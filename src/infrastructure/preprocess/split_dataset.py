@@ -17,8 +17,8 @@ NOTA: Este script é legado. O fluxo atual carrega protocolos XML via VectorStor
       Use este script apenas se precisar re-preparar datasets antigos para análise.
 """
 
-from functools import reduce
-import json
+from itertools import chain
+import orjson
 import math
 import os
 from pathlib import Path
@@ -35,34 +35,31 @@ def split(dataset, fold):
     output list of splited datasets
 
     Split the dataset for each label to ensure label proportion of different subsets are similar
+    Works on integer positions (columnar pmids/records) and only builds the fold dicts at the end
     '''
-    add = lambda x: reduce(lambda a, b: a+b, x)
-    
-    label2pmid = {'yes': [], 'no': [], 'maybe': []}
-    for pmid, info in dataset.items():
-        label2pmid[info['final_decision']].append(pmid)
+    pmids = list(dataset)
+    records = list(dataset.values())
 
-    label2pmid = {k: split_label(v, fold) for k, v in label2pmid.items()} # splited
+    label2idx = {'yes': [], 'no': [], 'maybe': []}
+    for i, info in enumerate(records):
+        label2idx[info['final_decision']].append(i)
 
-    output = []
+    label2idx = {k: split_label(v, fold) for k, v in label2idx.items()} # splited
 
-    for i in range(fold):
-        pmids = add([v[i] for _, v in label2pmid.items()])
-        output.append({pmid: dataset[pmid] for pmid in pmids})
+    folds = [list(chain.from_iterable(v[i] for v in label2idx.values())) for i in range(fold)]
 
-    if len(output[-1]) != len(output[0]): # imbalanced: [51, 51, 51, 51, 51, 51, 51, 51, 51, 41]
+    if len(folds[-1]) != len(folds[0]): # imbalanced: [51, 51, 51, 51, 51, 51, 51, 51, 51, 41]
         # randomly pick one from each to the last
         for i in range(fold-1):
-            pmids = list(output[i])
-            picked = random.choice(pmids)
-            output[-1][picked] = output[i][picked]
-            output[i].pop(picked)
+            picked = random.choice(folds[i])
+            folds[-1].append(picked)
+            folds[i].remove(picked)
 
-    return output
+    return [{pmids[j]: records[j] for j in idx} for idx in folds]
 
 def split_label(pmids, fold):
     '''
-    pmids: a list of pmids (of the same label)
+    pmids: a list of pmids or record positions (of the same label)
     fold: number of splits
 
     output: list of split lists
@@ -81,6 +78,21 @@ def split_label(pmids, fold):
 
     return output
 
+def load_dataset(path):
+    '''
+    Load a PubMedQA json file (pmid -> record) with orjson
+
+    The splits need every record in memory anyway, so a single orjson pass is
+    faster than streaming (ijson) and peaks at about the same memory
+    '''
+    return orjson.loads(Path(path).read_bytes())
+
+def dump_dataset(obj, path):
+    '''
+    Write a dataset dict as indented json (orjson, 2 spaces)
+    '''
+    Path(path).write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
 def combine_other(cv_sets, fold):
     '''
     combine other cv sets
@@ -105,12 +117,11 @@ if split_name == 'pqal':
     if not ori_pqal_file.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {ori_pqal_file}")
     
-    dataset = json.load(open(ori_pqal_file))
+    dataset = load_dataset(ori_pqal_file)
 
     CV_set, testset = split(dataset, 2)
     test_file = data_path / "ori_pqal" / "test_set.json"
-    with open(test_file, 'w') as f:
-        json.dump(testset, f, indent=4)
+    dump_dataset(testset, test_file)
 
     CV_sets = split(CV_set, 10)
     for i in range(10):
@@ -118,10 +129,8 @@ if split_name == 'pqal':
         if fold_dir.is_dir():
             shutil.rmtree(fold_dir)
         fold_dir.mkdir(parents=True, exist_ok=True)
-        with open(fold_dir / "dev_set.json", 'w') as f:
-            json.dump(CV_sets[i], f, indent=4)
-        with open(fold_dir / "train_set.json", 'w') as f:
-            json.dump(combine_other(CV_sets, i), f, indent=4)
+        dump_dataset(CV_sets[i], fold_dir / "dev_set.json")
+        dump_dataset(combine_other(CV_sets, i), fold_dir / "train_set.json")
 
 elif split_name == 'pqaa':
     # get 200k for training and rest for dev
@@ -130,7 +139,7 @@ elif split_name == 'pqaa':
     if not ori_pqaa_file.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {ori_pqaa_file}")
     
-    dataset = json.load(open(ori_pqaa_file))
+    dataset = load_dataset(ori_pqaa_file)
     
     pmids = list(dataset)
     random.shuffle(pmids)
@@ -141,7 +150,5 @@ elif split_name == 'pqaa':
     train_file = data_path / "ori_pqaa" / "pqaa_train_set.json"
     dev_file = data_path / "ori_pqaa" / "pqaa_dev_set.json"
     
-    with open(train_file, 'w') as f:
-        json.dump(train_split, f, indent=4)
-    with open(dev_file, 'w') as f:
-        json.dump(dev_split, f, indent=4)
+    dump_dataset(train_split, train_file)
+    dump_dataset(dev_split, dev_file)
@@ -7,21 +7,41 @@ from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception_type,
+    wait_random_exponential,
+    retry_if_exception,
 )
+from google.genai.errors import APIError
 from pybreaker import CircuitBreaker as PyCircuitBreaker
 import logging
 
 logger = logging.getLogger(__name__)
 
-@retry(
+# Falhas transitórias do Gemini: 429 (cota) e 503 (indisponível)
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """Erro do SDK google-genai (base do langchain-google-genai 4.x) com status 429/503."""
+    return isinstance(error, APIError) and error.code in RETRYABLE_STATUS_CODES
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Timeout ou limite de taxa/indisponibilidade do Gemini."""
+    return isinstance(error, TimeoutError) or _is_rate_limited(error)
+
+# Backoff exponencial com jitter evita que clientes concorrentes retentem em sincronia
+_llm_retry = retry(
     stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type(TimeoutError),
+    wait=wait_random_exponential(multiplier=1, min=2, max=30),
+    retry=retry_if_exception(_is_transient),
     before_sleep=lambda retry_state: logger.warning(
-        f"Retentativa {retry_state.attempt_number} após erro de timeout"
+        f"Retentativa {retry_state.attempt_number} após erro transitório: "
+        f"{retry_state.outcome.exception()!r}"
     )
 )
+
+
+@_llm_retry
 def call_llm_with_retry(chain, inputs: dict):
     """Chama LLM com retry automático."""
     try:
@@ -31,6 +51,29 @@ def call_llm_with_retry(chain, inputs: dict):
         raise
 
 
+@_llm_retry
+async def acall_llm_with_retry(chain, inputs: dict):
+    """Versão async: o backoff usa asyncio.sleep e não bloqueia o event loop."""
+    try:
+        return await chain.ainvoke(inputs)
+    except TimeoutError:
+        logger.error("Timeout ao chamar LLM")
+        raise
+
+
+@retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential(multiplier=1, min=2, max=30),
+    retry=retry_if_exception(_is_rate_limited),
+    before_sleep=lambda retry_state: logger.warning(
+        f"Retentativa {retry_state.attempt_number} após limite de taxa nos embeddings"
+    )
+)
+async def aembed_documents_with_retry(embeddings, texts: list) -> list:
+    """Gera embeddings de um lote (async) com retry em 429/503."""
+    return await embeddings.aembed_documents(texts)
+
+
 # Circuit breaker para proteção contra falhas cascata
 _llm_circuit_breaker = PyCircuitBreaker(
     fail_max=5,
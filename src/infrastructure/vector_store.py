@@ -3,72 +3,218 @@ Módulo: src/infrastructure/vector_store.py
 Descrição: Gerencia ingestão de XML (MedQuAD), JSON (PubMedQA) e PDF.
 """
 
-import json
+import asyncio
 import logging
+import multiprocessing
 import os
-import xml.etree.ElementTree as ET
-from typing import List
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, lru_cache
+from hashlib import blake2b
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import faiss
+import fitz  # PyMuPDF
+import ijson
+import numpy as np
+import orjson
+from lxml import etree
 
 from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain_core.documents import Document
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from src.config import settings
+from src.infrastructure.llm_factory import LLMFactory
+from src.infrastructure.resilience import aembed_documents_with_retry
 
 logger = logging.getLogger(__name__)
 
+# Avisos do MuPDF (PDFs levemente malformados) poluem o terminal; erros reais viram exceção
+fitz.TOOLS.mupdf_display_errors(False)
+
+COLLECTION_NAME = "medical_protocols"
+# Aplicado só na criação da coleção; construction_ef maior = grafo HNSW de melhor qualidade
+COLLECTION_METADATA = {"hnsw:space": "cosine", "hnsw:construction_ef": 200}
+# Registros por Collection.add (abaixo do limite padrão do Chroma, ~5461)
+INSERT_BATCH_SIZE = 5000
+# Arquivos enviados por vez a cada processo (amortiza IPC nos milhares de XMLs pequenos)
+LOADER_CHUNKSIZE = 16
+# Manifesto da ingestão, salvo junto ao chroma.sqlite3
+MANIFEST_FILE = "docs.manifest.json"
+# Chunks por arquivo, fora do banco: sobrevive a reset/troca de modelo de embedding
+CHUNK_CACHE_FILE = "chunks.cache.json"
+# Incrementar ao mudar a normalização/separadores (invalida o cache de chunks)
+CHUNKER_VERSION = 2
+CHUNK_SEPARATORS = ["\n\n", "\n", ".", " "]
+# Índice FAISS derivado da coleção Chroma (backend de busca opcional)
+FAISS_DIR = "faiss_index"
+FAISS_HNSW_M = 32
+FAISS_TRAIN_SAMPLE = 100_000
+# Acima disso o JSON do PubMedQA é lido em streaming (ijson); abaixo, de uma vez (orjson)
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+KNOWLEDGE_BASE_SUFFIXES = (".xml", ".json", ".pdf")
+
+# Consulta representativa usada apenas para aquecer índice e cliente de embeddings
+WARMUP_QUERY = "treatment guidelines for older adults"
+
+
+def _cosine_relevance(similarity: float) -> float:
+    """Produto interno de vetores normalizados já é o cosseno (mesma escala do Chroma)."""
+    return similarity
+
+
+# save_local não persiste estes parâmetros: construção e load_local precisam recebê-los.
+# relevance_score_fn: o padrão do LangChain para MAX_INNER_PRODUCT (1 - score) inverte o cosseno
+FAISS_STORE_OPTIONS = {
+    "distance_strategy": DistanceStrategy.MAX_INNER_PRODUCT,
+    "normalize_L2": True,
+    "relevance_score_fn": _cosine_relevance,
+}
+
+
+def _run_loader(job: Tuple[Callable[[str], List[Document]], str]) -> List[Document]:
+    """Executa (loader, caminho) em um processo do pool; precisa ser função de módulo."""
+    loader, file_path = job
+    return loader(file_path)
+
+
+# XPath compilados uma vez; string() devolve "" para elemento ausente ou vazio.
+# smart_strings=False evita que o resultado mantenha referência ao nó (que é liberado)
+_QUESTION_TEXT = etree.XPath("string(Question)", smart_strings=False)
+_ANSWER_TEXT = etree.XPath("string(Answer)", smart_strings=False)
+
+
+def _iter_pubmed_records(file_path: str):
+    """Itera pares (pmid, registro): orjson para arquivos pequenos, ijson para grandes."""
+    if os.path.getsize(file_path) <= STREAMING_THRESHOLD_BYTES:
+        with open(file_path, 'rb') as f:
+            yield from orjson.loads(f.read()).items()
+    else:
+        with open(file_path, 'rb') as f:
+            yield from ijson.kvitems(f, '', use_float=True)
+
+
+def _scan_files(directory: str) -> Iterator[os.DirEntry]:
+    """
+    Percorre a árvore com os.scandir (tipo do arquivo vem do próprio diretório,
+    sem stat extra), na ordem do os.walk: arquivos primeiro, depois subpastas.
+    """
+    subdirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith(KNOWLEDGE_BASE_SUFFIXES) and entry.is_file():
+                yield entry
+    for subdir in subdirs:
+        yield from _scan_files(subdir)
+
+
+def _file_signature(entry: os.DirEntry) -> dict:
+    """Tamanho e mtime do arquivo: detectam alterações sem ler o conteúdo."""
+    stat = entry.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _chunk_cache_key(rel_path: str, signature: dict) -> str:
+    """Chunks são determinísticos dado (arquivo, versão, parâmetros do splitter)."""
+    return "|".join(map(str, (
+        rel_path, signature["size"], signature["mtime_ns"],
+        CHUNKER_VERSION, settings.chunk_encoding, settings.chunk_size, settings.chunk_overlap,
+    )))
+
+
+_INLINE_SPACE_RE = re.compile(r"[^\S\n]+")
+_BLANK_LINES_RE = re.compile(r"\s*\n\s*\n\s*")
+_LINE_BREAK_RE = re.compile(r" ?\n ?")
+
+
+def _normalize_whitespace(text: str) -> str:
+    """Colapsa espaços, mantendo quebras de linha/parágrafo usadas como separadores."""
+    text = _INLINE_SPACE_RE.sub(" ", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return _LINE_BREAK_RE.sub("\n", text).strip()
+
+
+def _chunk_id(text: str) -> str:
+    """Id determinístico do chunk a partir do conteúdo (mesmo texto = mesmo id)."""
+    return blake2b(text.encode(), digest_size=16).hexdigest()
+
+
 class VectorStoreRepository:
-    """Gerencia operações com vector store (Chroma)."""
+    """
+    Gerencia operações com vector store.
+    
+    O Chroma é a fonte de verdade da ingestão; com VECTOR_BACKEND=faiss a busca
+    usa um índice FAISS em memória derivado da coleção.
+    """
     
     def __init__(self):
+        # Construção barata: embeddings e banco só são criados no primeiro uso
         self.docs_path = settings.docs_full_path
         self.db_path = settings.vector_db_full_path
-        self.embeddings = self._get_embeddings()
-        self.vector_store = self._initialize_vectorstore()
 
-    def _get_embeddings(self):
-        """Inicializa embeddings do Google Generative AI."""
-        logger.info("🔄 Inicializando embeddings...")
-        try:
-            embeddings = GoogleGenerativeAIEmbeddings(
-                model="models/embedding-001",
-                google_api_key=settings.gemini_api_key # type: ignore
-            )
-            logger.info("✅ Embeddings inicializados")
-            return embeddings
-        except Exception as e:
-            logger.error(f"❌ Erro ao inicializar embeddings: {e}")
-            raise
+    @cached_property
+    def embeddings(self):
+        """Usa os embeddings compartilhados da aplicação (mesmo modelo na ingestão e na busca)."""
+        return LLMFactory.get_embeddings()
+
+    @cached_property
+    def vector_store(self) -> Chroma:
+        return self._initialize_vectorstore()
+
+    @cached_property
+    def retrieval_store(self):
+        return self._initialize_retrieval_store()
 
-    def _load_medquad_xml(self, file_path: str) -> List[Document]:
+    @staticmethod
+    def _load_medquad_xml(file_path: str) -> List[Document]:
         """
         Parser para XML do MedQuAD. Lida com casos de respostas vazias (MedlinePlus).
         """
         docs = []
+        # Constantes por arquivo: calculadas/internadas uma vez e compartilhadas nos metadados
+        source = sys.intern(os.path.basename(file_path))
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            root = None
+            base_metadata = None
+            focus = "General Health"
+            url = 'URL não informada'
             
-            # Tenta pegar metadados globais do arquivo
-            focus_elem = root.find('Focus')
-            focus = focus_elem.text if focus_elem is not None else "General Health"
-            
-            # Pega a URL original se disponível (útil quando não há resposta no XML)
-            url = root.get('url', 'URL não informada')
-            
-            qa_pairs = root.findall('.//QAPair')
-            
-            for pair in qa_pairs:
-                question_elem = pair.find('Question')
-                answer_elem = pair.find('Answer')
+            # iterparse: processa um QAPair por vez e descarta-o, sem manter a árvore inteira
+            events = etree.iterparse(
+                file_path, events=("start", "end"),
+                remove_blank_text=True, collect_ids=False, resolve_entities=False
+            )
+            for event, elem in events:
+                if event == "start":
+                    if root is None:
+                        root = elem
+                        # Pega a URL original se disponível (útil quando não há resposta no XML)
+                        url = root.get('url', url)
+                    continue
                 
-                question = question_elem.text if question_elem is not None else ""
-                answer = answer_elem.text if answer_elem is not None else ""
+                # Metadado global do arquivo (vem antes dos QAPairs)
+                if elem.tag == 'Focus' and elem.getparent() is root:
+                    focus = sys.intern(elem.text or focus)
+                    continue
+                
+                if elem.tag != 'QAPair':
+                    continue
+                
+                pair = elem
+                question = _QUESTION_TEXT(pair)
+                answer = _ANSWER_TEXT(pair)
                 
                 # AJUSTE: Se não tiver resposta, criamos um aviso indicando a fonte
-                if not answer.strip(): # type: ignore
+                if not answer.strip():
                     answer = f"Conteúdo protegido por copyright. Consulte a fonte oficial: {url}"
                 
                 # Monta o conteúdo para o RAG
@@ -79,32 +225,39 @@ class VectorStoreRepository:
                     f"Source URL: {url}"
                 )
                 
-                metadata = {
-                    "source": os.path.basename(file_path),
-                    "type": "medquad_xml",
-                    "focus": focus,
-                    "original_id": pair.get("pid", "unknown")
-                }
+                # Metadados fixos do arquivo montados uma vez (Focus já foi lido);
+                # cada par só acrescenta o próprio id
+                if base_metadata is None:
+                    base_metadata = {
+                        "source": source,
+                        "type": "medquad_xml",
+                        "focus": focus,
+                    }
+                metadata = {**base_metadata, "original_id": pair.get("pid", "unknown")}
                 
                 docs.append(Document(page_content=page_content, metadata=metadata))
                 
+                # Libera o par já processado e os irmãos anteriores
+                pair.clear(keep_tail=False)
+                while pair.getprevious() is not None:
+                    del pair.getparent()[0]
+                
         except Exception as e:
-            print(f"⚠️ Erro no XML {os.path.basename(file_path)}: {e}")
+            print(f"⚠️ Erro no XML {source}: {e}")
             
         return docs
 
-    def _load_pubmed_json(self, file_path: str) -> List[Document]:
+    @staticmethod
+    def _load_pubmed_json(file_path: str) -> List[Document]:
         """
-        Carregador para PubMedQA (JSON).
+        Carregador para PubMedQA (JSON); arquivos grandes são lidos em streaming.
         """
         docs = []
+        source = sys.intern(os.path.basename(file_path))
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            print(f"   PubMedQA: processando {len(data)} registros de {os.path.basename(file_path)}...")
+            print(f"   PubMedQA: processando registros de {source}...")
             
-            for pubmed_id, content in data.items():
+            for pubmed_id, content in _iter_pubmed_records(file_path):
                 question = content.get("QUESTION", "")
                 contexts = content.get("CONTEXTS", [])
                 long_answer = content.get("LONG_ANSWER", "")
@@ -118,18 +271,41 @@ class VectorStoreRepository:
                 )
                 
                 metadata = {
-                    "source": os.path.basename(file_path),
+                    "source": source,
                     "pubmed_id": pubmed_id,
                     "type": "pubmed_qa"
                 }
                 docs.append(Document(page_content=page_content, metadata=metadata))
+            
+            print(f"   PubMedQA: {len(docs)} registros carregados")
         except Exception as e:
-            print(f"❌ Erro JSON {file_path}: {e}")
+            print(f"❌ Erro JSON {source}: {e}")
         return docs
 
-    def _load_documents(self):
+    @staticmethod
+    def _load_pdf(file_path: str) -> List[Document]:
         """
-        Varre recursivamente a pasta configurada (os.walk) para encontrar arquivos.
+        Carregador para PDFs via PyMuPDF direto (extração em C, sem a camada do
+        loader LangChain); um Document por página com texto.
+        """
+        source = sys.intern(os.path.basename(file_path))
+        try:
+            with fitz.open(file_path) as pdf:
+                total_pages = pdf.page_count
+                return [
+                    Document(
+                        page_content=text,
+                        metadata={"source": source, "type": "pdf", "page": number, "total_pages": total_pages},
+                    )
+                    for number, page in enumerate(pdf)
+                    if (text := page.get_text("text")).strip()
+                ]
+        except Exception:
+            return [] # Ignora erros de PDF corrompido
+
+    def _collect_files(self) -> List[Tuple[Callable[[str], List[Document]], os.DirEntry]]:
+        """
+        Varre recursivamente a pasta configurada e escolhe o loader de cada arquivo.
         """
         if not os.path.exists(settings.docs_path):
             # Tenta criar, mas avisa se estiver vazio
@@ -138,45 +314,183 @@ class VectorStoreRepository:
             return []
 
         print(f"📂 Varrendo base de conhecimento em: {settings.docs_path}")
-        all_docs = []
-
-        # os.walk garante que entramos em subpastas (7_SeniorHealth_QA, ori_pqal, etc)
-        for root, dirs, files in os.walk(settings.docs_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                
-                # 1. XMLs
-                if file.endswith(".xml"):
-                    all_docs.extend(self._load_medquad_xml(file_path))
-                
-                # 2. JSONs (apenas os de dados, ignorando configs)
-                elif file.endswith(".json"):
-                    if "pqal" in file or "ground_truth" in file:
-                         all_docs.extend(self._load_pubmed_json(file_path))
-                
-                # 3. PDFs
-                elif file.endswith(".pdf"):
-                    try:
-                        loader = PyPDFLoader(file_path)
-                        all_docs.extend(loader.load())
-                    except Exception:
-                        pass # Ignora erros de PDF corrompido
+        
+        files = []
+        # Entramos em subpastas (7_SeniorHealth_QA, ori_pqal, etc); só chegam as extensões suportadas
+        for entry in _scan_files(settings.docs_path):
+            name = entry.name
+            
+            # 1. XMLs
+            if name.endswith(".xml"):
+                files.append((self._load_medquad_xml, entry))
+            
+            # 2. JSONs (apenas os de dados, ignorando configs)
+            elif name.endswith(".json"):
+                if "pqal" in name or "ground_truth" in name:
+                    files.append((self._load_pubmed_json, entry))
+            
+            # 3. PDFs
+            else:
+                files.append((self._load_pdf, entry))
+        
+        return files
 
-        print(f"📄 Total de documentos carregados: {len(all_docs)}")
-        return all_docs
+    def _load_files(self, jobs) -> List[List[Document]]:
+        """Carrega os documentos de cada arquivo, na mesma ordem de jobs."""
+        if not jobs:
+            return []
+        
+        # Parsing em processos (XML/PDF são CPU-bound e o GIL serializa threads);
+        # map preserva a ordem dos arquivos, mantendo a ingestão determinística.
+        # spawn, não fork: a ingestão roda a partir de threads (init da CLI, initialize.py)
+        # com threads de gRPC/tokenizer/loguru vivas, e fork copiaria locks travados
+        with ProcessPoolExecutor(
+            max_workers=settings.ingest_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            loaded = list(executor.map(_run_loader, jobs, chunksize=LOADER_CHUNKSIZE))
+        
+        print(f"📄 Total de documentos carregados: {sum(map(len, loaded))}")
+        return loaded
 
-    def _chunk_documents(self, documents):
-        """Divide documentos em chunks."""
-        logger.info("✂️ Dividindo documentos em chunks...")
-        splitter = RecursiveCharacterTextSplitter(
+    @cached_property
+    def splitter(self) -> RecursiveCharacterTextSplitter:
+        """Splitter criado uma vez e reutilizado em todos os arquivos."""
+        # Medido em tokens (não caracteres): chunks cheios, sem truncamento no embedding
+        return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name=settings.chunk_encoding,
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
-            separators=["\n\n", "\n", ".", " ", ""]
+            # Sem "": o fallback por caractere é O(n²) em texto sem espaços (ex: PDF mal extraído)
+            separators=CHUNK_SEPARATORS
         )
-        chunks = splitter.split_documents(documents)
-        logger.info(f"✅ {len(chunks)} chunks criados")
+
+    def _chunk_documents(self, documents):
+        """Divide documentos em chunks."""
+        logger.debug("✂️ Dividindo documentos em chunks...")
+        for doc in documents:
+            doc.page_content = _normalize_whitespace(doc.page_content)
+        chunks = self.splitter.split_documents(documents)
+        logger.debug(f"✅ {len(chunks)} chunks criados")
         return chunks
     
+    def _embed_in_batches(self, texts: List[str]) -> np.ndarray:
+        """
+        WHEN [chunks precisam ser vetorizados na ingestão]
+        THE SYSTEM SHALL [enviar lotes de embed_batch_size textos por requisição]
+        
+        Retorna matriz float32 (n_textos, dim): cada lote é convertido ao chegar,
+        evitando manter milhões de floats Python (~32 bytes cada) em memória.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Sem event loop ativo: dispara os lotes em paralelo, com cliente próprio deste loop
+            return asyncio.run(self._aembed_in_batches(texts, LLMFactory.create_ingestion_embeddings()))
+        
+        # Já dentro de um event loop (não dá para aninhar asyncio.run): sequencial
+        batch_size = settings.embed_batch_size
+        return np.vstack([
+            np.asarray(self.embeddings.embed_documents(texts[start:start + batch_size]), dtype=np.float32)
+            for start in range(0, len(texts), batch_size)
+        ])
+    
+    async def _aembed_in_batches(self, texts: List[str], embeddings) -> np.ndarray:
+        """
+        WHEN [há vários lotes de embedding]
+        THE SYSTEM SHALL [enviá-los em paralelo, limitados por embed_concurrency]
+        
+        embeddings: instância criada para o loop atual (o cliente async fica preso a ele).
+        """
+        batch_size = settings.embed_batch_size
+        semaphore = asyncio.Semaphore(settings.embed_concurrency)
+        
+        async def embed_batch(batch: List[str]) -> np.ndarray:
+            async with semaphore:
+                vectors = await aembed_documents_with_retry(embeddings, batch)
+            return np.asarray(vectors, dtype=np.float32)
+        
+        # gather preserva a ordem dos lotes
+        results = await asyncio.gather(*(
+            embed_batch(texts[start:start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ))
+        return np.vstack(results)
+    
+    def _unique_chunks(self, chunks: List[Document]) -> Dict[str, Document]:
+        """Indexa chunks pelo hash do conteúdo, descartando duplicados (mantém o primeiro)."""
+        unique: Dict[str, Document] = {}
+        for chunk in chunks:
+            unique.setdefault(_chunk_id(chunk.page_content), chunk)
+        if len(unique) < len(chunks):
+            logger.debug(f"🧹 {len(chunks) - len(unique)} chunks duplicados descartados")
+        return unique
+    
+    @staticmethod
+    def _record_duplicate_source(first: Document, duplicate: Document) -> None:
+        """Registra no chunk mantido a origem de uma cópia idêntica descartada."""
+        source = duplicate.metadata.get("source")
+        if not source or source == first.metadata.get("source"):
+            return
+        # Chroma só aceita metadados escalares: fontes extras em string separada por "; "
+        sources = first.metadata.get("duplicate_sources")
+        if sources is None:
+            sources = source
+        elif source not in sources.split("; "):
+            sources = f"{sources}; {source}"
+        # Cópia: o dict original também é referenciado pelo cache de chunks
+        first.metadata = {**first.metadata, "duplicate_sources": sources}
+    
+    def _add_chunks(self, vector_store: Chroma, chunks: Dict[str, Document]) -> None:
+        """Insere chunks com vetores pré-calculados, sem re-embedding pelo Chroma."""
+        ids = list(chunks)
+        texts = [chunk.page_content for chunk in chunks.values()]
+        metadatas = [chunk.metadata for chunk in chunks.values()]
+        collection = vector_store._collection
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._aadd_chunks(collection, ids, texts, metadatas))
+        else:
+            # Já dentro de um event loop: vetoriza e insere janela a janela
+            for start in range(0, len(texts), INSERT_BATCH_SIZE):
+                end = start + INSERT_BATCH_SIZE
+                vectors = self._embed_in_batches(texts[start:end])
+                self._insert_window(collection, ids, texts, metadatas, vectors, start, end)
+        logger.info(f"✅ {len(texts)} chunks vetorizados em lotes de {settings.embed_batch_size}")
+    
+    async def _aadd_chunks(self, collection, ids: List[str], texts: List[str], metadatas: List[dict]) -> None:
+        """
+        WHEN [a ingestão tem várias janelas de INSERT_BATCH_SIZE chunks]
+        THE SYSTEM SHALL [vetorizar a próxima janela enquanto a anterior é gravada]
+        
+        Memória limitada a duas janelas e, se a ingestão cair, sync() retoma de onde parou.
+        """
+        # Cliente só deste asyncio.run: o singleton segue livre para o loop da CLI
+        embeddings = LLMFactory.create_ingestion_embeddings()
+        pending_insert = None
+        for start in range(0, len(texts), INSERT_BATCH_SIZE):
+            end = start + INSERT_BATCH_SIZE
+            vectors = await self._aembed_in_batches(texts[start:end], embeddings)
+            # Uma gravação por vez: o SQLite do Chroma serializa escritas de qualquer forma
+            if pending_insert is not None:
+                await pending_insert
+            pending_insert = asyncio.create_task(asyncio.to_thread(
+                self._insert_window, collection, ids, texts, metadatas, vectors, start, end
+            ))
+        if pending_insert is not None:
+            await pending_insert
+    
+    @staticmethod
+    def _insert_window(collection, ids, texts, metadatas, vectors: np.ndarray, start: int, end: int) -> None:
+        collection.add(
+            ids=ids[start:end],
+            documents=texts[start:end],
+            metadatas=metadatas[start:end],
+            embeddings=vectors.tolist(),
+        )
+        logger.info(f"💾 {min(end, len(texts))}/{len(texts)} chunks inseridos")
+    
     def _initialize_vectorstore(self):
         """Inicializa ou carrega vector store existente."""
         logger.info(f"💾 Inicializando Chroma em {self.db_path}...")
@@ -186,20 +500,24 @@ class VectorStoreRepository:
                 vector_store = Chroma(
                     embedding_function=self.embeddings,
                     persist_directory=str(self.db_path),
-                    collection_name="medical_protocols"
+                    collection_name=COLLECTION_NAME
                 )
                 logger.info("✅ Vectorstore carregado")
+                
+                # Com manifesto, só re-ingere arquivos alterados (custo: um stat por arquivo)
+                if self.manifest_path.exists():
+                    self._sync(vector_store)
+                else:
+                    logger.info("💡 Banco sem manifesto: execute 'python initialize.py --sync' para sincronizar")
             else:
                 logger.info("🆕 Criando novo banco vetorial...")
-                documents = self._load_documents()
-                chunks = self._chunk_documents(documents)
-                
-                vector_store = Chroma.from_documents(
-                    documents=chunks,
-                    embedding=self.embeddings,
+                vector_store = Chroma(
+                    embedding_function=self.embeddings,
                     persist_directory=str(self.db_path),
-                    collection_name="medical_protocols"
+                    collection_name=COLLECTION_NAME,
+                    collection_metadata=COLLECTION_METADATA
                 )
+                self._sync(vector_store)
                 logger.info("✅ Vectorstore criado")
             
             return vector_store
@@ -207,10 +525,246 @@ class VectorStoreRepository:
             logger.error(f"❌ Erro ao inicializar vectorstore: {e}")
             raise
 
+    @property
+    def manifest_path(self) -> Path:
+        return self.db_path / MANIFEST_FILE
+    
+    def _read_manifest(self) -> Optional[Dict[str, dict]]:
+        """Lê o manifesto {arquivo: {size, mtime_ns, ids}} da última ingestão."""
+        try:
+            return orjson.loads(self.manifest_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"⚠️ Manifesto inválido, sincronizando pela coleção: {e}")
+            return None
+    
+    def _write_manifest(self, manifest: Dict[str, dict]) -> None:
+        self.manifest_path.write_bytes(orjson.dumps(manifest))
+    
+    @property
+    def chunk_cache_path(self) -> Path:
+        return self.db_path.parent / CHUNK_CACHE_FILE
+    
+    def _read_chunk_cache(self) -> Dict[str, list]:
+        """Lê o cache {chave do arquivo: [[texto, metadata], ...]} de chunks."""
+        try:
+            return orjson.loads(self.chunk_cache_path.read_bytes())
+        except FileNotFoundError:
+            return {}
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"⚠️ Cache de chunks inválido, ignorando: {e}")
+            return {}
+    
+    def _write_chunk_cache(self, cache: Dict[str, list]) -> None:
+        self.chunk_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_cache_path.write_bytes(orjson.dumps(cache))
+    
+    def _existing_ids(self, collection, ids: List[str]) -> set:
+        """Quais dos ids já estão na coleção (consulta em lotes)."""
+        existing = set()
+        for start in range(0, len(ids), INSERT_BATCH_SIZE):
+            existing.update(collection.get(ids=ids[start:start + INSERT_BATCH_SIZE], include=[])["ids"])
+        return existing
+
+    def sync(self) -> None:
+        """Sincroniza o vectorstore com a base de conhecimento atual."""
+        self._sync(self.vector_store)
+        self.retrieval_store = self._initialize_retrieval_store()
+
+    def _sync(self, vector_store: Chroma) -> None:
+        """
+        WHEN [base de conhecimento é alterada]
+        THE SYSTEM SHALL [re-ingerir apenas arquivos novos/alterados e remover
+        chunks de arquivos que deixaram de existir]
+        
+        O manifesto guarda tamanho, mtime e ids de chunk por arquivo; os ids são
+        o hash do conteúdo, então chunks repetidos entre arquivos não são re-vetorizados.
+        """
+        logger.info("🔄 Sincronizando base de conhecimento...")
+        old_manifest = self._read_manifest()
+        previous_entries = old_manifest or {}
+        collection = vector_store._collection
+        
+        manifest: Dict[str, dict] = {}
+        changed_jobs = []
+        for loader, entry in self._collect_files():
+            rel_path = os.path.relpath(entry.path, settings.docs_path)
+            signature = _file_signature(entry)
+            previous = previous_entries.get(rel_path)
+            if previous and previous["size"] == signature["size"] and previous["mtime_ns"] == signature["mtime_ns"]:
+                manifest[rel_path] = previous
+            else:
+                manifest[rel_path] = signature
+                changed_jobs.append((rel_path, (loader, entry.path)))
+        removed_files = previous_entries.keys() - manifest.keys()
+        
+        if not manifest and previous_entries:
+            # Pasta vazia/inexistente (ex: executado de outro diretório): não apaga o banco
+            logger.warning(f"⚠️ Nenhum arquivo em {settings.docs_path}; sincronização ignorada")
+            return
+        
+        if not changed_jobs and not removed_files and old_manifest is not None:
+            logger.info("✅ Base de conhecimento inalterada")
+            return
+        
+        # Arquivos novos/alterados: chunks do cache ou parse + chunk, registrando os ids de cada um
+        chunk_cache = self._read_chunk_cache()
+        cache_keys = {rel_path: _chunk_cache_key(rel_path, manifest[rel_path]) for rel_path in manifest}
+        file_chunks: Dict[str, List[Document]] = {
+            rel_path: [Document(page_content=text, metadata=metadata) for text, metadata in chunk_cache[cache_keys[rel_path]]]
+            for rel_path, _ in changed_jobs
+            if cache_keys[rel_path] in chunk_cache
+        }
+        to_parse = [(rel_path, job) for rel_path, job in changed_jobs if rel_path not in file_chunks]
+        loaded = self._load_files([job for _, job in to_parse])
+        for (rel_path, _), docs in zip(to_parse, loaded):
+            file_chunks[rel_path] = self._chunk_documents(docs)
+            chunk_cache[cache_keys[rel_path]] = [[chunk.page_content, chunk.metadata] for chunk in file_chunks[rel_path]]
+        if len(file_chunks) > len(to_parse):
+            logger.info(f"♻️ {len(file_chunks) - len(to_parse)} arquivos reaproveitados do cache de chunks")
+        
+        new_chunks: Dict[str, Document] = {}
+        for rel_path, _ in changed_jobs:
+            chunks = self._unique_chunks(file_chunks[rel_path])
+            manifest[rel_path]["ids"] = list(chunks)
+            for chunk_id, chunk in chunks.items():
+                first = new_chunks.setdefault(chunk_id, chunk)
+                if first is not chunk:
+                    self._record_duplicate_source(first, chunk)
+        if duplicates := sum("duplicate_sources" in chunk.metadata for chunk in new_chunks.values()):
+            logger.info(f"🧹 {duplicates} chunks repetidos entre arquivos vetorizados uma única vez")
+        
+        kept_ids = set(chain.from_iterable(entry["ids"] for entry in manifest.values()))
+        if old_manifest is None:
+            # Sem manifesto (banco antigo ou novo): compara com o conteúdo da coleção
+            previous_ids = set(collection.get(include=[])["ids"])
+        else:
+            previous_ids = set(chain.from_iterable(entry["ids"] for entry in old_manifest.values()))
+        
+        stale = list(previous_ids - kept_ids)
+        for start in range(0, len(stale), INSERT_BATCH_SIZE):
+            collection.delete(ids=stale[start:start + INSERT_BATCH_SIZE])
+        
+        to_add = {chunk_id: chunk for chunk_id, chunk in new_chunks.items() if chunk_id not in previous_ids}
+        # Manifesto pode estar atrasado (ingestão interrompida): não re-vetoriza o que já existe
+        existing = self._existing_ids(collection, list(to_add))
+        to_add = {chunk_id: chunk for chunk_id, chunk in to_add.items() if chunk_id not in existing}
+        if to_add:
+            self._add_chunks(vector_store, to_add)
+        
+        self._write_manifest(manifest)
+        # Só mantém entradas de arquivos (versões) ainda presentes na base
+        live_keys = set(cache_keys.values())
+        live_cache = {key: value for key, value in chunk_cache.items() if key in live_keys}
+        if to_parse or len(live_cache) < len(chunk_cache):
+            self._write_chunk_cache(live_cache)
+        logger.info(
+            f"✅ Sincronização concluída: {len(changed_jobs)} arquivos novos/alterados, "
+            f"{len(removed_files)} removidos; {len(to_add)} chunks vetorizados, {len(stale)} excluídos"
+        )
+
+    def _initialize_retrieval_store(self):
+        """
+        WHEN [VECTOR_BACKEND=faiss]
+        THE SYSTEM SHALL [buscar em índice FAISS (produto interno sobre vetores
+        normalizados = cosseno), reconstruído apenas quando a ingestão muda]
+        """
+        if settings.vector_backend != "faiss":
+            return self.vector_store
+        
+        # Um diretório por modo de quantização: trocar o modo força reconstrução
+        faiss_path = self.db_path / FAISS_DIR / settings.faiss_quantization
+        index_file = faiss_path / "index.faiss"
+        # O manifesto só é regravado quando a coleção muda
+        stale = not index_file.exists() or (
+            self.manifest_path.exists()
+            and index_file.stat().st_mtime_ns < self.manifest_path.stat().st_mtime_ns
+        )
+        
+        try:
+            if not stale:
+                logger.info("📦 Carregando índice FAISS...")
+                # Arquivo gerado por esta própria aplicação
+                return FAISS.load_local(
+                    str(faiss_path), self.embeddings, allow_dangerous_deserialization=True,
+                    **FAISS_STORE_OPTIONS,
+                )
+            
+            logger.info("🆕 Construindo índice FAISS a partir do Chroma...")
+            data = self.vector_store._collection.get(include=["embeddings", "documents", "metadatas"])
+            if not data["ids"]:
+                logger.warning("⚠️ Coleção vazia: usando Chroma para a busca")
+                return self.vector_store
+            
+            vectors = np.asarray(data["embeddings"], dtype=np.float32)
+            faiss.normalize_L2(vectors)
+            
+            store = FAISS(
+                embedding_function=self.embeddings,
+                index=self._build_faiss_index(vectors),
+                docstore=InMemoryDocstore({
+                    doc_id: Document(page_content=text, metadata=metadata)
+                    for doc_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+                }),
+                index_to_docstore_id=dict(enumerate(data["ids"])),
+                **FAISS_STORE_OPTIONS,
+            )
+            store.save_local(str(faiss_path))
+            logger.info(f"✅ Índice FAISS ({settings.faiss_quantization}) com {len(data['ids'])} vetores")
+            return store
+        except Exception as e:
+            logger.error(f"❌ Erro no índice FAISS, usando Chroma: {e}")
+            return self.vector_store
+
+    @staticmethod
+    def _build_faiss_index(vectors: np.ndarray):
+        """
+        Índice de produto interno sobre vetores já normalizados.
+        
+        int8/fp16: HNSW com scalar quantizer (4x/2x menos memória, distância em SIMD);
+        none: busca exata (IndexFlatIP) em float32.
+        """
+        dim = vectors.shape[1]
+        if settings.faiss_quantization == "none":
+            index = faiss.IndexFlatIP(dim)
+        else:
+            qtype = (
+                faiss.ScalarQuantizer.QT_8bit if settings.faiss_quantization == "int8"
+                else faiss.ScalarQuantizer.QT_fp16
+            )
+            index = faiss.IndexHNSWSQ(dim, qtype, FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            # Treino só estima os intervalos por dimensão: uma amostra basta
+            sample_size = min(len(vectors), FAISS_TRAIN_SAMPLE)
+            sample = np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)
+            index.train(vectors[sample])
+        index.add(vectors)
+        return index
+
+    def warmup(self, query: str = WARMUP_QUERY) -> None:
+        """
+        WHEN [aplicação inicia]
+        THE SYSTEM SHALL [executar uma busca descartável para carregar o índice
+        HNSW persistido e abrir a conexão com a API de embeddings]
+        
+        Assim a primeira pergunta do usuário não paga o custo de inicialização.
+        """
+        try:
+            self.retrieval_store.similarity_search(query, k=1)
+            logger.info("🔥 Vectorstore aquecido")
+        except Exception as e:
+            logger.warning(f"⚠️ Aquecimento do vectorstore falhou: {e}")
+
     def get_retriever(self):
         """Retorna retriever configurado."""
-        return self.vector_store.as_retriever(
-            search_kwargs={"k": 4}
+        if settings.retrieval_score_threshold > 0:
+            # Filtro pela similaridade já calculada na busca (sem custo extra por documento)
+            return self.retrieval_store.as_retriever(
+                search_type="similarity_score_threshold",
+                search_kwargs={"k": settings.retrieval_k, "score_threshold": settings.retrieval_score_threshold},
+            )
+        return self.retrieval_store.as_retriever(
+            search_kwargs={"k": settings.retrieval_k}
         )
     
     def reset_vectorstore(self):
@@ -220,4 +774,11 @@ class VectorStoreRepository:
         if self.db_path.exists():
             shutil.rmtree(self.db_path)
         self.vector_store = self._initialize_vectorstore()
-        logger.info("✅ Vectorstore resetado")
\ No newline at end of file
+        self.retrieval_store = self._initialize_retrieval_store()
+        logger.info("✅ Vectorstore resetado")
+
+
+@lru_cache(maxsize=1)
+def get_vector_store_repository() -> VectorStoreRepository:
+    """Repositório único por processo: banco e embeddings são abertos uma só vez."""
+    return VectorStoreRepository()
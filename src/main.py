@@ -1,22 +1,245 @@
 #!/usr/bin/env python3
 """Interface CLI para o Assistente Médico Virtual."""
 
+import asyncio
 import sys
+import threading
+from concurrent.futures import Future
+from itertools import islice
 from pathlib import Path
+from typing import Optional
 
 project_root = Path(__file__).parent.parent.resolve()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from loguru import logger
+from src.config import settings
 from src.utils.logging import setup_logging
 from src.domain.state import AgentState
-from src.use_cases.graph import GraphBuilder
+
+
+# Valores iniciais constantes; copiado a cada pergunta. Sem "documents": uma lista
+# no template seria compartilhada entre cópias rasas (os nós leem com default [])
+_INITIAL_STATE_TEMPLATE: AgentState = {
+    "is_safe": True,
+    "generation": "",
+    "hallucination_check": "",
+}
+
+EXIT_COMMANDS = frozenset({"sair", "exit", "quit", "q"})
+_MAX_EXIT_COMMAND_LENGTH = max(map(len, EXIT_COMMANDS))
+
+# Status da validação de alucinação → (emoji, mensagem exibida)
+HALLUCINATION_STATUS_DISPLAY = {
+    "valid": ("✅", "[Validado com semântica]"),
+    "valid_keywords": ("✅", "[Validado com keywords]"),
+    "valid_rejection": ("ℹ️", "[Rejeição apropriada]"),
+    "possible_hallucination": ("⚠️", "[Aviso: possível alucinação]"),
+    "no_docs_available": ("ℹ️", "[Sem docs para validar]"),
+}
+
+# Estados finais que não devem ser reaproveitados
+UNCACHEABLE_CHECKS = ("possible_hallucination", "validation_error")
+
+
+def _initialize_ai_system():
+    """Compila o grafo, carrega a base de conhecimento e conecta o cache."""
+    # Imports pesados (LangChain, Chroma, FAISS, PyMuPDF...) feitos aqui, em segundo
+    # plano: o banner e o prompt aparecem sem esperar por eles
+    from src.infrastructure.vector_store import get_vector_store_repository
+    from src.use_cases.graph import get_compiled_app
+    
+    logger.info("🔨 Inicializando grafo de orquestração...")
+    app = get_compiled_app()
+    # Retriever é preguiçoso: carregado e aquecido aqui, antes da primeira pergunta
+    get_vector_store_repository().warmup()
+    logger.info("✅ Grafo inicializado com sucesso\n")
+    return app, _create_response_cache()
+
+
+def _start_background_initialization() -> Future:
+    """
+    WHEN [CLI inicia]
+    THE SYSTEM SHALL [inicializar o sistema enquanto o usuário lê o banner e digita]
+    """
+    future: Future = Future()
+    
+    def run():
+        try:
+            future.set_result(_initialize_ai_system())
+        except BaseException as e:
+            future.set_exception(e)
+    
+    # Daemon: 'sair' durante a carga encerra sem esperar a inicialização
+    threading.Thread(target=run, name="ai-system-init", daemon=True).start()
+    return future
+
+
+def _wait_for_ai_system(init_future: Future):
+    if not init_future.done():
+        print("⏳ Finalizando inicialização do sistema...\n")
+    try:
+        return init_future.result()
+    except Exception as e:
+        logger.critical(f"❌ Erro crítico ao inicializar: {e}", exc_info=True)
+        print(f"\n❌ ERRO CRÍTICO: {e}")
+        print("Verifique os logs em logs/machado-oraculo-errors.log para mais detalhes.\n")
+        sys.exit(1)
+
+
+USER_PROMPT = "👨‍⚕️  Você: "
+
+
+def get_user_input() -> Optional[str]:
+    """
+    Lê a próxima pergunta; None em fim de entrada (EOF).
+    
+    Terminal interativo usa input() (histórico/edição do readline); entrada
+    redirecionada (scripts, benchmarks) lê direto do stdin.
+    """
+    if sys.stdin.isatty():
+        try:
+            return input(USER_PROMPT).strip()
+        except EOFError:
+            return None
+    
+    sys.stdout.write(USER_PROMPT)
+    sys.stdout.flush()
+    line = sys.stdin.readline()
+    return line.strip() if line else None
+
+
+def should_exit_application(user_input: str) -> bool:
+    """Entrada é um comando de saída? (perguntas longas não geram cópia em minúsculas)"""
+    if len(user_input) > _MAX_EXIT_COMMAND_LENGTH:
+        return False
+    return user_input.lower() in EXIT_COMMANDS
+
+
+def display_response(result: dict, streamed_text: str = "") -> None:
+    """Exibe resposta (ou recusa), status da validação e fontes."""
+    # Campos lidos uma única vez
+    is_safe = result.get("is_safe", True)
+    generation = result.get("generation", "")
+    generation_final = result.get("generation_final")
+    hallucination_status = result.get("hallucination_check", "")
+    # Ausente quando os guardrails rejeitam a pergunta antes da busca
+    documents = result.get("documents") or []
+    
+    if is_safe is False:
+        logger.warning("Pergunta rejeitada pelos guardrails")
+        print(f"⚠️  Assistente: {generation or 'Pergunta fora do escopo médico.'}\n")
+    else:
+        logger.info(f"Resposta gerada e validada: {hallucination_status}")
+        
+        response = generation_final or generation or "Desculpe, não consegui processar."
+        if not streamed_text:
+            print(f"🤖 Assistente: {response}\n")
+        elif response != generation:
+            # Texto exibido em streaming foi traduzido depois
+            print(f"🌐 Assistente (tradução): {response}\n")
+        
+        status = HALLUCINATION_STATUS_DISPLAY.get(hallucination_status)
+        if status:
+            print(f"{status[0]} {status[1]}\n")
+    
+    # Mostrar fontes (nada é exibido sem documentos)
+    display_sources(documents)
+
+
+def display_sources(documents, limit: int = 3) -> None:
+    """Lista as fontes consultadas com uma única escrita no terminal."""
+    if not documents:
+        return
+    total = len(documents)
+    lines = [f"   • {doc.metadata.get('source', 'Desconhecido')}" for doc in islice(documents, limit)]
+    if total > limit:
+        lines.append(f"   … e mais {total - limit} protocolos")
+    sys.stdout.write("📚 Protocolos consultados:\n" + "\n".join(lines) + "\n\n")
+
+
+def create_initial_agent_state(question: str) -> AgentState:
+    """Estado inicial do grafo para a pergunta do usuário."""
+    state = _INITIAL_STATE_TEMPLATE.copy()
+    state["medical_question"] = question
+    return state
+
+
+def _create_response_cache():
+    """Cache de respostas; a CLI funciona sem ele se o Redis (servidor ou pacote) não estiver disponível."""
+    try:
+        from src.infrastructure.cache_store import ResponseCache
+        
+        cache = ResponseCache(settings.redis_url, semantic=settings.semantic_cache)
+        cache.redis_client.ping()
+        logger.info("✅ Cache de respostas conectado")
+        return cache
+    except Exception as e:
+        logger.warning(f"⚠️ Cache de respostas desativado (Redis indisponível): {e}")
+        return None
+
+
+def _get_cached_result(cache, question: str):
+    if cache is None:
+        return None
+    try:
+        return cache.get_cached_response(question)
+    except Exception as e:
+        logger.warning(f"⚠️ Falha ao consultar cache: {e}")
+        return None
+
+
+def _cache_result(cache, question: str, result: dict) -> None:
+    """Guarda apenas respostas seguras e validadas."""
+    if cache is None or result.get("is_safe") is False:
+        return
+    if result.get("hallucination_check") in UNCACHEABLE_CHECKS:
+        return
+    try:
+        cache.cache_response(
+            question,
+            result.get("documents", []),
+            result.get("generation", ""),
+            generation_final=result.get("generation_final", ""),
+            hallucination_check=result.get("hallucination_check", ""),
+            is_safe=True,
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Falha ao gravar cache: {e}")
+
+
+async def _run_graph_streaming(app, initial_state: AgentState):
+    """
+    WHEN [resposta está sendo gerada]
+    THE SYSTEM SHALL [exibir os tokens do nó generate à medida que chegam]
+    
+    Retorna o estado final e o texto já exibido.
+    """
+    result: dict = {}
+    streamed = []
+    async for event in app.astream_events(initial_state, version="v2"):
+        kind = event["event"]
+        # Só o nó generate: guardrails/tradução também chamam o LLM
+        if kind == "on_chat_model_stream" and event["metadata"].get("langgraph_node") == "generate":
+            if not streamed:
+                print("🤖 Assistente: ", end="", flush=True)
+            token = event["data"]["chunk"].content
+            streamed.append(token)
+            print(token, end="", flush=True)
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            # Evento final do grafo (raiz): estado completo
+            result = event["data"]["output"]
+    
+    if streamed:
+        print("\n")
+    return result, "".join(streamed)
 
 
 def main():
     """Inicia a interface CLI do assistente médico."""
     setup_logging(level="INFO")
+    init_future = _start_background_initialization()
     
     print("\n" + "=" * 70)
     print("🏥 MACHADO ORÁCULO - Assistente Médico Virtual")
@@ -25,19 +248,20 @@ def main():
     print("Desenvolvido com LangChain + LangGraph + Google Gemini\n")
     
     try:
-        logger.info("🔨 Inicializando grafo de orquestração...")
-        graph_builder = GraphBuilder()
-        app = graph_builder.build()
-        logger.info("✅ Grafo inicializado com sucesso\n")
+        app = response_cache = None
+        
+        # Um único event loop para a sessão: clientes async (LLM/embeddings) ficam
+        # associados a ele e são reutilizados entre perguntas
+        loop = asyncio.new_event_loop()
         
         print("-" * 70)
         print("💬 Digite suas dúvidas clínicas (ou 'sair' para encerrar)\n")
         
         while True:
             try:
-                question = input("👨‍⚕️  Você: ").strip()
+                question = get_user_input()
                 
-                if question.lower() in ("sair", "exit", "quit", "q"):
+                if question is None or should_exit_application(question):
                     print("\n👋 Encerrando assistente médico. Até logo!\n")
                     logger.info("🛑 Usuário encerrou a sessão")
                     break
@@ -46,60 +270,22 @@ def main():
                     print("⚠️  Digite uma pergunta válida\n")
                     continue
                 
+                if app is None:
+                    app, response_cache = _wait_for_ai_system(init_future)
+                
                 logger.debug(f"Processando pergunta: {question[:60]}...")
                 print("\n🔍 Processando pergunta...\n")
                 
-                initial_state: AgentState = {
-                    "medical_question": question,
-                    "is_safe": True,
-                    "documents": [],
-                    "generation": "",
-                    "hallucination_check": "",
-                } # type: ignore
+                initial_state = create_initial_agent_state(question)
                 
-                result = app.invoke(initial_state)
+                # Pergunta igual/equivalente já respondida: pula o grafo inteiro
+                streamed_text = ""
+                result = _get_cached_result(response_cache, question)
+                if result is None:
+                    result, streamed_text = loop.run_until_complete(_run_graph_streaming(app, initial_state))
+                    _cache_result(response_cache, question, result)
                 
-                # ✅ NOVO: Mostrar status de validação
-                hallucination_status = result.get("hallucination_check", "")
-                
-                if result.get("is_safe") is False:
-                    logger.warning("Pergunta rejeitada pelos guardrails")
-                    print(f"⚠️  Assistente: {result.get('generation', 'Pergunta fora do escopo médico.')}\n")
-                else:
-                    # Mostrar status da validação de alucinação
-                    if hallucination_status == "valid":
-                        status_emoji = "✅"
-                        status_msg = "[Validado com semântica]"
-                    elif hallucination_status == "valid_keywords":
-                        status_emoji = "✅"
-                        status_msg = "[Validado com keywords]"
-                    elif hallucination_status == "valid_rejection":
-                        status_emoji = "ℹ️"
-                        status_msg = "[Rejeição apropriada]"
-                    elif hallucination_status == "possible_hallucination":
-                        status_emoji = "⚠️"
-                        status_msg = "[Aviso: possível alucinação]"
-                    elif hallucination_status == "no_docs_available":
-                        status_emoji = "ℹ️"
-                        status_msg = "[Sem docs para validar]"
-                    else:
-                        status_emoji = "❓"
-                        status_msg = ""
-                    
-                    logger.info(f"Resposta gerada e validada: {hallucination_status}")
-                    
-                    print(f"🤖 Assistente: {result.get('generation', 'Desculpe, não consegui processar.')}\n")
-                    
-                    if status_msg:
-                        print(f"{status_emoji} {status_msg}\n")
-                
-                # Mostrar fontes
-                if result.get("documents"):
-                    print("📚 Protocolos consultados:")
-                    for doc in result["documents"][:3]:
-                        source = doc.metadata.get("source", "Desconhecido")
-                        print(f"   • {source}")
-                    print()
+                display_response(result, streamed_text)
                 
             except KeyboardInterrupt:
                 print("\n\n👋 Interrupção do usuário. Encerrando...\n")
@@ -108,6 +294,8 @@ def main():
             except Exception as e:
                 logger.error(f"❌ Erro ao processar pergunta: {e}", exc_info=True)
                 print(f"❌ Erro técnico: {e}\n")
+        
+        loop.close()
     
     except Exception as e:
         logger.critical(f"❌ Erro crítico ao inicializar: {e}", exc_info=True)
@@ -5,8 +5,11 @@ Motivo da alteração: Implementação do fluxo linear com verificação de segu
 e validação de resposta, orquestrando os nós criados anteriormente.
 """
 
+import inspect
 import logging
-from langgraph.graph import StateGraph
+from functools import lru_cache
+from langgraph.graph import END, START, StateGraph
+from src.config import settings
 from src.domain.state import AgentState
 from src.use_cases.nodes import RAGNodes
 
@@ -24,39 +27,100 @@ class GraphBuilder:
         workflow = StateGraph(AgentState)
         
         # Adicionar nós (com nós de tradução)
-        workflow.add_node("detect_language", self._log_node("detect_language", self.nodes.detect_language))
-        workflow.add_node("translate_to_en", self._log_node("translate_to_en", self.nodes.translate_question_to_english))
-        workflow.add_node("guardrails", self._log_node("guardrails", self.nodes.guardrails_check))
-        workflow.add_node("retrieve", self._log_node("retrieve", self.nodes.retrieve))
+        workflow.add_node("retrieve", self._log_node("retrieve", self.nodes.aretrieve))
         workflow.add_node("grade", self._log_node("grade", self.nodes.grade_documents))
         workflow.add_node("generate", self._log_node("generate", self.nodes.generate))
-        workflow.add_node("translate_response", self._log_node("translate_response", self.nodes.translate_response_to_original_language))
+        workflow.add_node("translate_response", self._log_node("translate_response", self.nodes.atranslate_response_to_original_language))
         workflow.add_node("validate", self._log_node("validate", self.nodes.validate_hallucination))
         
-        # Definir edges (com nós de tradução)
-        workflow.add_edge("detect_language", "translate_to_en")
-        workflow.add_edge("translate_to_en", "guardrails")
-        workflow.add_edge("guardrails", "retrieve")
-        workflow.add_edge("retrieve", "grade")
-        workflow.add_edge("grade", "generate")
+        if settings.fused_preprocess:
+            # Idioma + tradução + guardrails: um nó, no máximo uma chamada ao LLM
+            workflow.add_node("preprocess", self._log_node("preprocess", self.nodes.apreprocess_question))
+            workflow.add_edge(START, "preprocess")
+            workflow.add_conditional_edges(
+                "preprocess", self._route_after_preprocess, {"retrieve": "retrieve", "grade": "grade", END: END}
+            )
+            workflow.add_edge("retrieve", "grade")
+        else:
+            self._add_preprocess_nodes(workflow)
+        workflow.add_conditional_edges("grade", self._route_after_grade, {"generate": "generate", END: END})
+        # Tradução e validação dependem só da resposta gerada (e escrevem chaves
+        # distintas): rodam em paralelo, sem somar as duas latências
         workflow.add_edge("generate", "translate_response")
-        workflow.add_edge("translate_response", "validate")
-        
-        # Ponto de entrada
-        workflow.set_entry_point("detect_language")
+        workflow.add_edge("generate", "validate")
         
         # Ponto final
-        workflow.set_finish_point("validate")
+        workflow.add_edge(["translate_response", "validate"], END)
         
         logger.info("✅ Grafo RAG com tradução construído")
         
         return workflow.compile()
     
+    def _add_preprocess_nodes(self, workflow: StateGraph) -> None:
+        """Detecção, tradução e guardrails como nós separados (até grade)."""
+        workflow.add_node("detect_language", self._log_node("detect_language", self.nodes.detect_language))
+        workflow.add_node("translate_to_en", self._log_node("translate_to_en", self.nodes.atranslate_question_to_english))
+        workflow.add_node("guardrails", self._log_node("guardrails", self.nodes.aguardrails_check))
+        
+        workflow.add_edge(START, "detect_language")
+        workflow.add_edge("detect_language", "translate_to_en")
+        if settings.parallel_guardrails:
+            # Guardrails (pergunta original) roda em paralelo com detecção/tradução/busca;
+            # latência = o mais lento dos dois ramos, mas a busca roda mesmo se rejeitada
+            workflow.add_edge(START, "guardrails")
+            workflow.add_edge("translate_to_en", "retrieve")
+            # Junção: grade só executa quando os dois ramos terminam
+            workflow.add_edge(["guardrails", "retrieve"], "grade")
+        else:
+            # Sequencial: pergunta rejeitada encerra antes de qualquer busca/geração
+            workflow.add_edge("translate_to_en", "guardrails")
+            workflow.add_conditional_edges("guardrails", self._route_after_guardrails, {"retrieve": "retrieve", END: END})
+            workflow.add_edge("retrieve", "grade")
+    
+    @staticmethod
+    def _route_after_guardrails(state: AgentState) -> str:
+        return "retrieve" if state.get("is_safe") else END
+    
+    @staticmethod
+    def _route_after_preprocess(state: AgentState) -> str:
+        """Documentos já buscados em paralelo pelo pré-processamento seguem direto para grade."""
+        if not state.get("is_safe"):
+            return END
+        return "grade" if "documents" in state else "retrieve"
+    
+    @staticmethod
+    def _route_after_grade(state: AgentState) -> str:
+        """Pergunta rejeitada pelos guardrails encerra o fluxo sem gerar resposta."""
+        return END if state.get("is_safe") is False else "generate"
+    
     def _log_node(self, node_name: str, node_fn):
-        """Wrapper que loga entrada e saída."""
+        """Wrapper que loga entrada e saída (preserva nós assíncronos)."""
+        # Fora do nível DEBUG o nó é registrado sem wrapper (nível lido na construção do grafo)
+        if not logger.isEnabledFor(logging.DEBUG):
+            return node_fn
+        
+        if inspect.iscoroutinefunction(node_fn):
+            async def async_wrapper(state: AgentState) -> dict:
+                logger.debug(f"▶️ Nó: {node_name}")
+                result = await node_fn(state)
+                logger.debug(f"◀️ Saída: {list(result.keys())}")
+                return result
+            return async_wrapper
+        
         def wrapper(state: AgentState) -> dict:
             logger.debug(f"▶️ Nó: {node_name}")
             result = node_fn(state)
             logger.debug(f"◀️ Saída: {list(result.keys())}")
             return result
-        return wrapper
\ No newline at end of file
+        return wrapper
+
+
+@lru_cache(maxsize=1)
+def get_compiled_app():
+    """
+    Grafo compilado uma única vez por processo e reutilizado entre invocações.
+    
+    Não é persistido em disco: os nós carregam clientes de LLM/embeddings e
+    locks, que não são serializáveis, e compilar custa pouco perto deles.
+    """
+    return GraphBuilder().build()
@@ -8,17 +8,107 @@ Motivo da alteração:
 - Suporte a múltiplos idiomas (detecção e tradução).
 """
 
+import asyncio
 import logging
-import math
-from typing import List
+import re
+from functools import cached_property, lru_cache
+from itertools import islice, zip_longest
+from typing import List, Optional
+import numpy as np
 from langchain_core.documents import Document
+from pydantic import BaseModel, Field
+from src.config import settings
 from src.domain.state import AgentState
 from src.domain.guardrails import GuardrailsValidator
 from src.infrastructure.llm_factory import LLMFactory
-from src.infrastructure.vector_store import VectorStoreRepository
+from src.infrastructure.vector_store import get_vector_store_repository
+from src.utils.translation import LanguageDetector, Translator
 
 logger = logging.getLogger(__name__)
 
+# Frases que indicam uma rejeição apropriada (resposta sem acesso aos dados)
+REJECTION_PHRASES = (
+    "não tenho acesso", "não posso responder", "desculpe", "não encontrei",
+    "não foi possível", "não consegui", "sem acesso", "indisponível",
+)
+_REJECTION_RE = re.compile("|".join(map(re.escape, REJECTION_PHRASES)), re.IGNORECASE)
+
+# Prefixo comparado na deduplicação de documentos recuperados
+DEDUPE_PREFIX_CHARS = 256
+
+# Máximo de perguntas pré-processadas mantidas em cache
+PREPROCESS_CACHE_SIZE = 1024
+
+# Trecho de cada protocolo enviado ao LLM na geração
+CONTEXT_PREVIEW_CHARS = 500
+
+# Chunks com palavras já tokenizadas (o corpus é fixo: os mesmos chunks voltam entre perguntas)
+DOC_TOKENS_CACHE_SIZE = 1024
+
+# Instruções fixas primeiro e campos variáveis no fim: o prefixo idêntico entre
+# chamadas é reaproveitado pelo cache implícito de prompts do Gemini
+PREPROCESS_PROMPT = """For the question below:
+1. Translate it to English, keeping medical terminology accurate (if it is already in English, repeat it unchanged).
+2. Decide whether it is about medicine, health, diseases, treatments, clinical protocols,
+   diagnoses, symptoms, medications, surgeries or similar clinical topics.
+
+Question language: {language_name}
+Question: "{question}"
+"""
+
+LANGUAGE_NAMES = {"pt": "Portuguese", "en": "English"}
+
+# Prompts de geração: montados uma vez no import, só a formatação ocorre por pergunta
+SYSTEM_PROMPT_WITH_DOCS = """Você é um assistente médico especializado em protocolos clínicos.
+Baseado nos protocolos fornecidos, responda à pergunta do médico com precisão.
+SEMPRE cite os protocolos utilizados na resposta."""
+
+SYSTEM_PROMPT_NO_DOCS = """Você é um assistente médico. 
+Infelizmente, nenhum protocolo foi encontrado na base de conhecimento para esta pergunta.
+Informe ao usuário que a pergunta não pode ser respondida completamente sem acesso aos protocolos."""
+
+NO_DOCS_CONTEXT = "⚠️ Nenhum protocolo foi encontrado na base de conhecimento."
+
+GENERATION_PROMPT = """{system_prompt}
+
+Protocolos de referência:
+{context}
+
+Pergunta do médico:
+{question}
+
+Resposta (cite os protocolos utilizados se disponíveis):"""
+
+
+def _context_preview(content: str, limit: int = CONTEXT_PREVIEW_CHARS) -> str:
+    """Trecho do chunk cortado em fronteira de palavra; reticências só quando há corte."""
+    content = content.strip()
+    if len(content) <= limit:
+        return content
+    # Sem meia palavra no fim (viraria tokens sem sentido no prompt)
+    cut = max(content.rfind(" ", 0, limit + 1), content.rfind("\n", 0, limit + 1))
+    return content[:cut if cut > 0 else limit].rstrip() + "..."
+
+
+@lru_cache(maxsize=DOC_TOKENS_CACHE_SIZE)
+def _document_tokens(content: str) -> frozenset:
+    """Palavras em minúsculas de um chunk, calculadas uma vez por conteúdo."""
+    return frozenset(content.lower().split())
+
+
+@lru_cache(maxsize=DOC_TOKENS_CACHE_SIZE)
+def _document_key_terms(content: str, limit: int = 20) -> tuple:
+    """Primeiros termos-chave (alfanuméricos, 4+ letras) de um chunk, usados na validação por keywords."""
+    terms = (w.lower() for w in content.split() if len(w) >= 4 and w.isalnum())
+    return tuple(islice(terms, limit))
+
+
+class PreprocessResult(BaseModel):
+    """Saída estruturada do pré-processamento da pergunta (tradução + relevância)."""
+    
+    english_question: str = Field(..., description="The question translated to English")
+    is_medical: bool = Field(..., description="Whether the question is about medicine or health")
+
 
 class RAGNodes:
     """Nós de processamento para o grafo RAG."""
@@ -29,18 +119,155 @@ class RAGNodes:
         
         # ✅ NOVO: Inicializar todos os componentes
         self.guardrails = GuardrailsValidator()
+        self.translator = Translator()
         self.llm = LLMFactory.get_llm()
         self.embeddings = LLMFactory.get_embeddings()
+        self._cached_preprocess = lru_cache(maxsize=PREPROCESS_CACHE_SIZE)(self._request_preprocess)
+        
+        logger.debug("✅ RAGNodes inicializado com sucesso")
+    
+    @cached_property
+    def retriever(self):
+        """
+        WHEN [primeira busca vetorial]
+        THE SYSTEM SHALL [carregar (ou construir) o vector store]
         
-        # Vector store for retrieval
+        Adiado para não bloquear a inicialização da CLI (ex: usuário digita 'sair').
+        """
         try:
-            vector_repo = VectorStoreRepository()
-            self.retriever = vector_repo.get_retriever()
+            logger.info("📚 Carregando base de conhecimento...")
+            return get_vector_store_repository().get_retriever()
         except Exception as e:
             logger.warning(f"⚠️ Erro ao inicializar vector store: {e}")
-            self.retriever = None
+            return None
+    
+    def preprocess_question(self, state: AgentState) -> dict:
+        """
+        Detecção de idioma, tradução e guardrails em um único nó.
         
-        logger.debug("✅ RAGNodes inicializado com sucesso")
+        WHEN [pergunta é recebida]
+        THE SYSTEM SHALL [detectar idioma, traduzir e validar com no máximo uma chamada ao LLM]
+        """
+        return self._preprocess(state, self._detect_language(state.get("medical_question", "")))
+    
+    async def apreprocess_question(self, state: AgentState) -> dict:
+        """
+        Versão assíncrona de preprocess_question (nó usado pelo grafo).
+        
+        WHEN [pergunta já está em inglês e busca em paralelo está habilitada]
+        THE SYSTEM SHALL [buscar documentos enquanto a pertinência é validada]
+        """
+        # Caches síncronos (lru_cache) e fallback síncrono: executam em thread
+        question = state.get("medical_question", "")
+        language = await asyncio.to_thread(self._detect_language, question)
+        if language != "en" or not settings.parallel_guardrails:
+            return await asyncio.to_thread(self._preprocess, state, language)
+        
+        # Em inglês a busca usa a própria pergunta (não depende do LLM);
+        # o resultado é descartado se a pergunta for rejeitada
+        result, retrieval = await asyncio.gather(
+            asyncio.to_thread(self._preprocess, state, language),
+            self.aretrieve({"medical_question_en": question}),
+        )
+        if not result.get("is_safe"):
+            return result
+        return {**result, "medical_question_en": question, **retrieval}
+    
+    @staticmethod
+    def _detect_language(question: str) -> str:
+        language = LanguageDetector.detect_language(question)
+        logger.info(f"🌐 Idioma detectado: {language}")
+        return language
+    
+    def _preprocess(self, state: AgentState, language: str) -> dict:
+        question = state.get("medical_question", "")
+        try:
+            # Comprimento, PII e termos clínicos: locais, sem LLM
+            precheck = self.guardrails.precheck(question)
+            if precheck is not None and not precheck.is_valid:
+                logger.warning(f"❌ Validação rejeitada: {precheck.reason}")
+                return {"language": language, **self._guardrails_result(False)}
+            if precheck is not None and language == "en":
+                # Já em inglês e claramente médica: nenhuma chamada ao LLM
+                return {"language": language, "medical_question_en": question, **self._guardrails_result(True)}
+            
+            # Tradução e relevância na mesma requisição (espaços normalizados para o cache)
+            result = self._cached_preprocess(" ".join(question.split()), language)
+        except Exception as e:
+            logger.warning(f"⚠️ Pré-processamento unificado falhou, usando etapas separadas: {e}")
+            return {
+                "language": language,
+                **self.translate_question_to_english({**state, "language": language}),
+                **self.guardrails_check(state),
+            }
+        
+        is_safe = precheck is not None or result.is_medical
+        if not is_safe:
+            logger.warning(f"❌ Validação rejeitada: {self.guardrails.not_medical_result().reason}")
+        logger.debug(f"🌐 Pergunta para busca: {result.english_question[:60]}...")
+        return {
+            "language": language,
+            "medical_question_en": result.english_question,
+            **self._guardrails_result(is_safe),
+        }
+    
+    def _request_preprocess(self, question: str, language: str) -> PreprocessResult:
+        """
+        Chama o LLM com saída estruturada.
+        
+        Chamado através de `_cached_preprocess` (lru_cache); exceções não
+        são cacheadas e propagam para `preprocess_question`.
+        """
+        prompt = PREPROCESS_PROMPT.format(language_name=LANGUAGE_NAMES.get(language, language), question=question)
+        return self._preprocess_llm.invoke(prompt)
+    
+    @cached_property
+    def _preprocess_llm(self):
+        return self.llm.with_structured_output(PreprocessResult)
+    
+    def detect_language(self, state: AgentState) -> dict:
+        """Detecta o idioma da pergunta do usuário."""
+        question = state.get("medical_question", "")
+        
+        language = LanguageDetector.detect_language(question)
+        logger.info(f"🌐 Idioma detectado: {language}")
+        
+        return {"language": language}
+    
+    def translate_question_to_english(self, state: AgentState) -> dict:
+        """Traduz a pergunta para inglês (idioma da base de conhecimento)."""
+        question = state.get("medical_question", "")
+        language = state.get("language", "en")
+        
+        question_en = self.translator.translate(question, source_lang=language, target_lang="en")  # type: ignore
+        logger.debug(f"🌐 Pergunta para busca: {question_en[:60]}...")
+        
+        return {"medical_question_en": question_en}
+    
+    async def atranslate_question_to_english(self, state: AgentState) -> dict:
+        """Versão assíncrona de translate_question_to_english (nó usado pelo grafo)."""
+        # Tradução usa cache síncrono (lru_cache): executa em thread, sem bloquear o loop
+        return await asyncio.to_thread(self.translate_question_to_english, state)
+    
+    def translate_response_to_original_language(self, state: AgentState) -> dict:
+        """Traduz a resposta para o idioma original da pergunta, se necessário."""
+        generation = state.get("generation", "")
+        language = state.get("language", "en")
+        
+        if not generation:
+            return {"generation_final": generation}
+        
+        # O LLM pode já ter respondido no idioma do usuário: só traduz se diferente
+        generation_language = LanguageDetector.detect_language(generation)
+        generation_final = self.translator.translate(
+            generation, source_lang=generation_language, target_lang=language  # type: ignore
+        )
+        
+        return {"generation_final": generation_final}
+    
+    async def atranslate_response_to_original_language(self, state: AgentState) -> dict:
+        """Versão assíncrona de translate_response_to_original_language (nó usado pelo grafo)."""
+        return await asyncio.to_thread(self.translate_response_to_original_language, state)
     
     def guardrails_check(self, state: AgentState) -> dict:
         """Valida segurança e pertinência médica da pergunta."""
@@ -49,59 +276,118 @@ class RAGNodes:
         question = state.get("medical_question", "")
         
         try:
-            is_valid = self.guardrails.validate(question)
-            
-            if is_valid:
-                logger.info("✅ Tema médico válido.")
-                return {"is_safe": True}
-            else:
-                logger.warning("⚠️ Tema fora do escopo médico.")
-                return {
-                    "is_safe": False,
-                    "generation": "Desculpe, sua pergunta não é relacionada a temas médicos. Por favor, formule uma pergunta sobre saúde ou protocolos clínicos."
-                }
+            return self._guardrails_result(self.guardrails.validate(question))
         except Exception as e:
-            logger.error(f"❌ Erro na validação de guardrails: {e}", exc_info=True)
+            return self._guardrails_error(e)
+    
+    async def aguardrails_check(self, state: AgentState) -> dict:
+        """Versão assíncrona de guardrails_check (nó usado pelo grafo)."""
+        # Validação usa caches síncronos (lru_cache): executa em thread, sem bloquear o loop
+        return await asyncio.to_thread(self.guardrails_check, state)
+    
+    @staticmethod
+    def _guardrails_result(is_valid: bool) -> dict:
+        if is_valid:
+            logger.info("✅ Tema médico válido.")
+            return {"is_safe": True}
+        else:
+            logger.warning("⚠️ Tema fora do escopo médico.")
             return {
                 "is_safe": False,
-                "generation": f"Erro ao validar pergunta: {str(e)}"
+                "generation": "Desculpe, sua pergunta não é relacionada a temas médicos. Por favor, formule uma pergunta sobre saúde ou protocolos clínicos."
             }
     
+    @staticmethod
+    def _guardrails_error(error: Exception) -> dict:
+        logger.error(f"❌ Erro na validação de guardrails: {error}", exc_info=True)
+        return {
+            "is_safe": False,
+            "generation": f"Erro ao validar pergunta: {str(error)}"
+        }
+    
     def retrieve(self, state: AgentState) -> dict:
         """Recupera documentos relevantes da base vetorial."""
-        question = state.get("medical_question", "")
-        logger.debug(f"🔍 Iniciando busca vetorial para: {question[:60]}...")
+        # Base de conhecimento em inglês: busca com a pergunta traduzida
+        queries = self._retrieval_queries(state)
+        logger.debug(f"🔍 Iniciando busca vetorial para: {queries[0][:60]}...")
         
         try:
             if not self.retriever:
                 logger.warning("⚠️ Retriever não está disponível")
                 return {"documents": []}
             
-            documents = self.retriever.invoke(question)
-            
-            if not isinstance(documents, list):
-                logger.warning(f"⚠️ Retriever retornou tipo inesperado: {type(documents)}")
-                documents = list(documents) if hasattr(documents, '__iter__') else []
-            
-            logger.info(f"✅ Recuperados {len(documents)} documentos relevantes")
-            
-            for i, doc in enumerate(documents):
-                logger.debug(f"  Doc {i+1}: {type(doc).__name__} - "
-                           f"Content length: {len(doc.page_content) if hasattr(doc, 'page_content') else 'N/A'} chars")
+            if len(queries) == 1:
+                return self._retrieval_result(self.retriever.invoke(queries[0]))
             
-            return {"documents": documents}
+            # Várias consultas em paralelo (batch usa um pool de threads); resultados
+            # intercalados (melhores de cada consulta primeiro) e repetidos removidos
+            results = self.retriever.batch(queries)
+            return self._retrieval_result(
+                [doc for ranked in zip_longest(*results) for doc in ranked if doc is not None]
+            )
         
         except Exception as e:
-            logger.error(f"❌ Erro na recuperação: {e}", exc_info=True)
-            return {
-                "documents": [],
-                "generation": "Erro ao buscar protocolos na base de conhecimento."
-            }
+            return self._retrieval_error(e)
+    
+    async def aretrieve(self, state: AgentState) -> dict:
+        """Versão assíncrona de retrieve (nó usado pelo grafo)."""
+        # Chroma/FAISS locais são síncronos e o primeiro acesso carrega o vector store:
+        # tudo em thread, fora do event loop
+        return await asyncio.to_thread(self.retrieve, state)
+    
+    @staticmethod
+    def _retrieval_queries(state: AgentState) -> List[str]:
+        """Pergunta em inglês e, com multi_query_retrieval, também a original (se diferente)."""
+        question_en = state.get("medical_question_en") or state.get("medical_question", "")
+        if not settings.multi_query_retrieval:
+            return [question_en]
+        return list(dict.fromkeys([question_en, state.get("medical_question") or question_en]))
+    
+    @staticmethod
+    def _retrieval_result(documents) -> dict:
+        if not isinstance(documents, list):
+            logger.warning(f"⚠️ Retriever retornou tipo inesperado: {type(documents)}")
+            documents = list(documents) if hasattr(documents, '__iter__') else []
+        
+        documents = RAGNodes._dedupe_documents(documents)
+        logger.info(f"✅ Recuperados {len(documents)} documentos relevantes")
+        
+        for i, doc in enumerate(documents):
+            logger.debug(f"  Doc {i+1}: {type(doc).__name__} - "
+                       f"Content length: {len(doc.page_content) if hasattr(doc, 'page_content') else 'N/A'} chars")
+        
+        return {"documents": documents}
+    
+    @staticmethod
+    def _dedupe_documents(documents: list) -> list:
+        """Remove documentos repetidos (mesmo início de conteúdo), mantendo a ordem de relevância."""
+        seen = set()
+        unique = []
+        for doc in documents:
+            key = getattr(doc, "page_content", None)
+            key = key[:DEDUPE_PREFIX_CHARS] if isinstance(key, str) else id(doc)
+            if key not in seen:
+                seen.add(key)
+                unique.append(doc)
+        if len(unique) < len(documents):
+            logger.debug(f"🧹 {len(documents) - len(unique)} documentos repetidos descartados")
+        return unique
+    
+    @staticmethod
+    def _retrieval_error(error: Exception) -> dict:
+        # Sem "generation": roda em paralelo com guardrails, que é quem escreve a rejeição
+        logger.error(f"❌ Erro na recuperação: {error}", exc_info=True)
+        return {"documents": []}
     
     def grade_documents(self, state: AgentState) -> dict:
         """Avalia relevância dos documentos recuperados."""
+        if state.get("is_safe") is False:
+            # Busca já rodou em paralelo com guardrails: descarta os documentos
+            logger.debug("⏭️ Pergunta rejeitada: avaliação ignorada")
+            return {"documents": []}
+        
         documents = state.get("documents", [])
-        question = state.get("medical_question", "")
+        question = state.get("medical_question_en") or state.get("medical_question", "")
         
         logger.debug(f"📊 Avaliando {len(documents)} documentos para pergunta: {question[:50]}...")
         
@@ -112,17 +398,16 @@ class RAGNodes:
         try:
             useful_docs = []
             
+            # Pergunta normalizada uma única vez (não por documento)
+            question_words = set(question.lower().split())
+            
             for i, doc in enumerate(documents):
                 if not isinstance(doc, Document):
                     logger.warning(f"⚠️ Item {i} não é Document: tipo={type(doc).__name__}")
                     continue
                 
-                doc_content = doc.page_content.lower()
-                question_lower = question.lower()
-                
-                question_words = set(question_lower.split())
-                doc_words = set(doc_content.split())
-                overlap = len(question_words & doc_words) / max(len(question_words), 1)
+                shared = question_words & _document_tokens(doc.page_content)
+                overlap = len(shared) / max(len(question_words), 1)
                 
                 logger.debug(f"  Doc {i+1}: Sobreposição={overlap:.2%}")
                 
@@ -141,8 +426,8 @@ class RAGNodes:
             logger.error(f"❌ Erro ao avaliar documentos: {e}", exc_info=True)
             return {"documents": documents}
     
-    def generate(self, state: AgentState) -> dict:
-        """Gera resposta clínica baseada em documentos."""
+    async def generate(self, state: AgentState) -> dict:
+        """Gera resposta clínica baseada em documentos (tokens transmitidos via astream_events)."""
         documents = state.get("documents", [])
         question = state.get("medical_question", "")
         
@@ -152,52 +437,47 @@ class RAGNodes:
             return {"generation": "Pergunta vazia fornecida."}
         
         try:
-            context = ""
-            if documents:
-                context = "Protocolos consultados:\n\n"
-                for i, doc in enumerate(documents, 1):
-                    if isinstance(doc, Document):
-                        source = doc.metadata.get("source", f"Protocolo {i}")
-                        preview = doc.page_content[:500]
-                        context += f"{i}. **{source}**\n{preview}...\n\n"
-                    else:
-                        logger.warning(f"⚠️ Documento {i} não é do tipo Document: {type(doc)}")
-            else:
-                logger.warning("⚠️ Nenhum documento disponível para geração")
-                context = "⚠️ Nenhum protocolo foi encontrado na base de conhecimento."
-            
-            if documents:
-                system_prompt = """Você é um assistente médico especializado em protocolos clínicos.
-Baseado nos protocolos fornecidos, responda à pergunta do médico com precisão.
-SEMPRE cite os protocolos utilizados na resposta."""
-            else:
-                system_prompt = """Você é um assistente médico. 
-Infelizmente, nenhum protocolo foi encontrado na base de conhecimento para esta pergunta.
-Informe ao usuário que a pergunta não pode ser respondida completamente sem acesso aos protocolos."""
-            
-            prompt = f"""{system_prompt}
-
-Protocolos de referência:
-{context}
-
-Pergunta do médico:
-{question}
-
-Resposta (cite os protocolos utilizados se disponíveis):"""
-            
-            response = self.llm.invoke(prompt)
-            generation = response.content if hasattr(response, 'content') else str(response)
-            
-            logger.info("✅ Resposta gerada com sucesso")
-            logger.debug(f"  Tamanho da resposta: {len(generation)} chars")
-            
-            return {"generation": generation}
+            response = await self.llm.ainvoke(self._build_generation_prompt(question, documents))
+            return self._generation_result(response)
         
         except Exception as e:
-            logger.error(f"❌ Erro ao gerar resposta: {e}", exc_info=True)
-            return {"generation": f"Erro ao gerar resposta: {str(e)}"}
+            return self._generation_error(e)
+    
+    @staticmethod
+    def _build_generation_prompt(question: str, documents: List[Document]) -> str:
+        if not documents:
+            logger.warning("⚠️ Nenhum documento disponível para geração")
+            return GENERATION_PROMPT.format(
+                system_prompt=SYSTEM_PROMPT_NO_DOCS, context=NO_DOCS_CONTEXT, question=question
+            )
+        
+        sections = ["Protocolos consultados:\n\n"]
+        for i, doc in enumerate(documents, 1):
+            if isinstance(doc, Document):
+                source = doc.metadata.get("source", f"Protocolo {i}")
+                sections.append(f"{i}. **{source}**\n{_context_preview(doc.page_content)}\n\n")
+            else:
+                logger.warning(f"⚠️ Documento {i} não é do tipo Document: {type(doc)}")
+        
+        return GENERATION_PROMPT.format(
+            system_prompt=SYSTEM_PROMPT_WITH_DOCS, context="".join(sections), question=question
+        )
+    
+    @staticmethod
+    def _generation_result(response) -> dict:
+        generation = response.content if hasattr(response, 'content') else str(response)
+        
+        logger.info("✅ Resposta gerada com sucesso")
+        logger.debug(f"  Tamanho da resposta: {len(generation)} chars")
+        
+        return {"generation": generation}
+    
+    @staticmethod
+    def _generation_error(error: Exception) -> dict:
+        logger.error(f"❌ Erro ao gerar resposta: {error}", exc_info=True)
+        return {"generation": f"Erro ao gerar resposta: {str(error)}"}
     
-    def validate_hallucination(self, state: AgentState) -> dict:
+    async def validate_hallucination(self, state: AgentState) -> dict:
         """
         Valida se a resposta está baseada nos documentos (sem alucinações).
         
@@ -209,75 +489,114 @@ Resposta (cite os protocolos utilizados se disponíveis):"""
         
         logger.debug(f"🔍 Validando alucinações... (docs={len(documents)}, gen_len={len(generation)})")
         
+        try:
+            precheck = self._hallucination_precheck(generation, documents)
+            if precheck is not None:
+                return precheck
+            
+            # Camada 2: Validação semântica com embeddings
+            has_semantic_match = await self._semantic_validation(generation, documents)
+            return self._hallucination_result(has_semantic_match, generation, documents)
+        
+        except Exception as e:
+            return self._hallucination_error(e)
+        finally:
+            self._log_cache_stats()
+    
+    def _log_cache_stats(self) -> None:
+        """Acertos/consultas dos caches em memória (acumulados no processo), ao fim de cada pergunta."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        caches = {
+            "pré-processamento": self._cached_preprocess,
+            "relevância": self.guardrails._classify_relevance,
+            "embeddings": self.embeddings,
+        }
+        stats = []
+        for name, cache in caches.items():
+            info = cache.cache_info() if hasattr(cache, "cache_info") else None
+            if info is not None:
+                stats.append(f"{name} {info.hits}/{info.hits + info.misses}")
+        logger.debug(f"📈 Caches (acertos/consultas): {', '.join(stats)}")
+    
+    @staticmethod
+    def _hallucination_precheck(generation: str, documents: List[Document]) -> Optional[dict]:
+        """Casos decididos sem embeddings; None = seguir para a validação semântica."""
         # Caso 1: Sem documentos recuperados
         if not documents:
             logger.warning("⚠️ Sem documentos para validar hallucination")
             logger.info("💡 Modo fallback: Aceitando resposta pois não há documentos para validação")
             return {"hallucination_check": "no_docs_available"}
         
-        try:
-            # Camada 1: Rejeição óbvia se resposta diz "não tenho acesso"
-            if any(phrase in generation.lower() for phrase in 
-                   ["não tenho acesso", "não posso responder", "desculpe", "não encontrei",
-                    "não foi possível", "não consegui", "sem acesso", "indisponível"]):
-                logger.info("✅ Resposta é uma rejeição apropriada (sem acesso aos dados)")
-                return {"hallucination_check": "valid_rejection"}
-            
-            # Camada 2: Validação semântica com embeddings
-            has_semantic_match = self._semantic_validation(generation, documents)
-            
-            if has_semantic_match:
-                logger.info("✅ Resposta validada (semelhança semântica com documentos)")
-                return {"hallucination_check": "valid"}
-            
-            # Camada 3: Fallback para keyword matching
-            has_keyword_match = self._keyword_validation(generation, documents)
-            
-            if has_keyword_match:
-                logger.info("✅ Resposta validada (palavras-chave dos documentos encontradas)")
-                return {"hallucination_check": "valid_keywords"}
-            
-            logger.warning("⚠️ Possível alucinação detectada (sem correspondência com documentos)")
-            logger.debug(f"  Resposta: {generation[:100]}...")
-            
-            return {"hallucination_check": "possible_hallucination"}
+        # Camada 1: Rejeição óbvia se resposta diz "não tenho acesso"
+        if _REJECTION_RE.search(generation):
+            logger.info("✅ Resposta é uma rejeição apropriada (sem acesso aos dados)")
+            return {"hallucination_check": "valid_rejection"}
         
-        except Exception as e:
-            logger.error(f"❌ Erro na validação: {e}", exc_info=True)
-            return {"hallucination_check": "validation_error"}
+        return None
     
-    def _semantic_validation(self, generation: str, documents: List[Document]) -> bool:
-        """Valida usando embeddings e similiaridade semântica."""
+    def _hallucination_result(self, has_semantic_match: bool, generation: str, documents: List[Document]) -> dict:
+        if has_semantic_match:
+            logger.info("✅ Resposta validada (semelhança semântica com documentos)")
+            return {"hallucination_check": "valid"}
+        
+        # Camada 3: Fallback para keyword matching
+        has_keyword_match = self._keyword_validation(generation, documents)
+        
+        if has_keyword_match:
+            logger.info("✅ Resposta validada (palavras-chave dos documentos encontradas)")
+            return {"hallucination_check": "valid_keywords"}
+        
+        logger.warning("⚠️ Possível alucinação detectada (sem correspondência com documentos)")
+        logger.debug(f"  Resposta: {generation[:100]}...")
+        
+        return {"hallucination_check": "possible_hallucination"}
+    
+    @staticmethod
+    def _hallucination_error(error: Exception) -> dict:
+        logger.error(f"❌ Erro na validação: {error}", exc_info=True)
+        return {"hallucination_check": "validation_error"}
+    
+    async def _semantic_validation(self, generation: str, documents: List[Document]) -> bool:
+        """Valida usando embeddings e similiaridade semântica (textos vetorizados em paralelo)."""
         try:
-            docs_to_check = documents[:3]
+            doc_texts = self._semantic_doc_texts(documents)
             
             logger.debug("📊 Calculando similiaridade semântica...")
-            gen_embedding = self.embeddings.embed_query(generation)
-            
-            max_similarity = 0.0
+            # Textos repetidos disparados juntos não chegariam a aproveitar o cache
+            texts = self._unique_texts(generation, doc_texts)
+            vectors = dict(zip(texts, await asyncio.gather(*map(self.embeddings.aembed_query, texts))))
             
-            for i, doc in enumerate(docs_to_check):
-                if not isinstance(doc, Document):
-                    continue
-                
-                doc_embedding = self.embeddings.embed_query(doc.page_content[:500])
-                similarity = self._cosine_similarity(gen_embedding, doc_embedding)
-                logger.debug(f"  Doc {i+1}: Similiaridade = {similarity:.3f}")
-                
-                max_similarity = max(max_similarity, similarity)
-            
-            semantic_threshold = 0.4
-            
-            if max_similarity >= semantic_threshold:
-                logger.debug(f"✅ Similiaridade semântica OK (max={max_similarity:.3f} >= {semantic_threshold})")
-                return True
-            else:
-                logger.debug(f"❌ Similiaridade semântica baixa (max={max_similarity:.3f} < {semantic_threshold})")
-                return False
+            return self._semantic_verdict(vectors[generation], [vectors[text] for text in doc_texts])
         
         except Exception as e:
-            logger.warning(f"⚠️ Erro na validação semântica: {e}")
+            # Nunca aprova às cegas: sem embeddings, decide a camada de palavras-chave
+            logger.error(f"❌ Erro na validação semântica, usando palavras-chave: {e}", exc_info=True)
+            return False
+    
+    @staticmethod
+    def _unique_texts(generation: str, doc_texts: List[str]) -> List[str]:
+        """Resposta + trechos sem repetições (ordem preservada): um embedding por texto distinto."""
+        return list(dict.fromkeys([generation, *doc_texts]))
+    
+    @staticmethod
+    def _semantic_doc_texts(documents: List[Document]) -> List[str]:
+        return [doc.page_content[:500] for doc in documents[:3] if isinstance(doc, Document)]
+    
+    def _semantic_verdict(self, gen_embedding: list, doc_embeddings: List[list]) -> bool:
+        similarities = self._cosine_similarities(gen_embedding, doc_embeddings)
+        for i, similarity in enumerate(similarities):
+            logger.debug(f"  Doc {i+1}: Similiaridade = {similarity:.3f}")
+        
+        max_similarity = float(similarities.max(initial=0.0))
+        semantic_threshold = 0.4
+        
+        if max_similarity >= semantic_threshold:
+            logger.debug(f"✅ Similiaridade semântica OK (max={max_similarity:.3f} >= {semantic_threshold})")
             return True
+        else:
+            logger.debug(f"❌ Similiaridade semântica baixa (max={max_similarity:.3f} < {semantic_threshold})")
+            return False
     
     def _keyword_validation(self, generation: str, documents: List[Document]) -> bool:
         """Validação por palavras-chave com critério menos rigoroso."""
@@ -287,9 +606,7 @@ Resposta (cite os protocolos utilizados se disponíveis):"""
             
             for doc in documents:
                 if isinstance(doc, Document):
-                    words = [w.lower() for w in doc.page_content.split() 
-                            if len(w) >= 4 and w.isalnum()]
-                    doc_terms.update(words[:20])
+                    doc_terms.update(_document_key_terms(doc.page_content))
             
             logger.debug(f"📝 Termos-chave documentos: {list(doc_terms)[:10]}...")
             
@@ -311,13 +628,11 @@ Resposta (cite os protocolos utilizados se disponíveis):"""
             logger.warning(f"⚠️ Erro na validação por keywords: {e}")
             return False
     
-    def _cosine_similarity(self, vec_a: list, vec_b: list) -> float:
-        """Calcula similiaridade coseno entre dois vetores."""
-        dot_product = sum(a * b for a, b in zip(vec_a, vec_b))
-        magnitude_a = math.sqrt(sum(a ** 2 for a in vec_a))
-        magnitude_b = math.sqrt(sum(b ** 2 for b in vec_b))
-        
-        if magnitude_a == 0 or magnitude_b == 0:
-            return 0.0
-        
-        return dot_product / (magnitude_a * magnitude_b)
\ No newline at end of file
+    @staticmethod
+    def _cosine_similarities(vector: list, matrix: List[list]) -> np.ndarray:
+        """Similiaridade coseno do vetor com cada linha da matriz, em uma operação (vetor nulo → 0)."""
+        query = np.asarray(vector, dtype=np.float32)
+        rows = np.asarray(matrix, dtype=np.float32).reshape(-1, query.size)
+        dots = rows @ query
+        norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(query)
+        return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
\ No newline at end of file
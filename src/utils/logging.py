@@ -44,14 +44,19 @@ def setup_logging(level: str = "INFO") -> None:
         "{message}"
     )
     
+    # enqueue=True: a escrita (console/arquivo) ocorre em thread própria, fora do
+    # caminho da pergunta; a fila é esvaziada no encerramento (logger.remove no atexit)
+    
     # Handler para console (stdout)
+    # diagnose=False: não despeja valores de variáveis (perguntas podem conter dados clínicos)
     logger.add(
         sys.stdout,
         format=console_format,
         level=level,
         colorize=True,
-        backtrace=True,
-        diagnose=True,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
     )
     
     # Handler para arquivo de log (rotação diária)
@@ -62,7 +67,8 @@ def setup_logging(level: str = "INFO") -> None:
         rotation="00:00",  # Rotação diária à meia-noite
         retention="7 days",  # Manter últimos 7 dias
         compression="zip",  # Comprimir logs antigos
-        backtrace=True,
+        enqueue=True,
+        backtrace=False,
         diagnose=False,  # Desabilitar diagnóstico em arquivo para economizar espaço
     )
     
@@ -74,11 +80,14 @@ def setup_logging(level: str = "INFO") -> None:
         rotation="00:00",
         retention="30 days",
         compression="zip",
+        enqueue=True,
         backtrace=True,
+        diagnose=False,
     )
     
-    # Configurar logging padrão do Python para usar loguru
-    logging.basicConfig(handlers=[InterceptHandler()], level=0)
+    # Configurar logging padrão do Python para usar loguru. Mesmo nível dos handlers:
+    # chamadas abaixo dele são descartadas no próprio logger (sem passar pelo interceptor)
+    logging.basicConfig(handlers=[InterceptHandler()], level=level)
     
     logger.info("✅ Sistema de logging inicializado com sucesso")
 
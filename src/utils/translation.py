@@ -5,6 +5,8 @@ Suporta português ↔ inglês para integração com base de conhecimento em ing
 
 import logging
 import re
+from collections import Counter
+from functools import lru_cache
 from typing import Literal
 from langdetect import detect, DetectorFactory
 from src.infrastructure.llm_factory import LLMFactory
@@ -14,32 +16,34 @@ logger = logging.getLogger(__name__)
 # Determinístico para detecção de idioma
 DetectorFactory.seed = 0
 
+# Palavras-chave em português médico. Apenas tokens simples (o texto é
+# comparado palavra a palavra); termos comuns aos dois idiomas, como
+# "diabetes", foram omitidos pois pontuariam igual para ambos.
+PORTUGUESE_MEDICAL_KEYWORDS = frozenset({
+    "protocolo", "tratamento", "medicamento", "paciente", "saúde",
+    "diagnóstico", "sintoma", "doença", "infecção",
+    "médico", "idoso", "sepse", "pressão",
+    "hipertensão", "febre", "dor", "fadiga",
+    "qual", "como", "quando", "onde",
+    "você", "seus", "sua", "dele", "dela", "pode", "deve",
+    "é", "são", "está", "estão", "foi", "foram"
+})
+
+# Palavras-chave em inglês médico
+ENGLISH_MEDICAL_KEYWORDS = frozenset({
+    "protocol", "treatment", "medication", "patient", "health",
+    "diagnosis", "symptom", "disease", "infection",
+    "doctor", "elderly", "sepsis", "pressure",
+    "hypertension", "fever", "pain", "fatigue",
+    "what", "how", "when", "where", "why", "which",
+    "you", "your", "his", "her", "can", "should",
+    "is", "are", "was", "were", "be", "been"
+})
+
 
 class LanguageDetector:
     """Detecta o idioma de um texto."""
     
-    # Palavras-chave em português médico
-    PORTUGUESE_MEDICAL_KEYWORDS = {
-        "protocolo", "tratamento", "medicamento", "paciente", "saúde",
-        "diagnóstico", "sintoma", "doença", "infecção", "hospital",
-        "médico", "idoso", "sepse", "pneumonia", "pressão",
-        "diabetes", "hipertensão", "febre", "dor", "fadiga",
-        "qual", "como", "quando", "onde", "por que", "o que",
-        "você", "seus", "sua", "dele", "dela", "pode", "deve",
-        "é", "são", "está", "estão", "foi", "foram"
-    }
-    
-    # Palavras-chave em inglês médico
-    ENGLISH_MEDICAL_KEYWORDS = {
-        "protocol", "treatment", "medication", "patient", "health",
-        "diagnosis", "symptom", "disease", "infection", "hospital",
-        "doctor", "elderly", "sepsis", "pneumonia", "pressure",
-        "diabetes", "hypertension", "fever", "pain", "fatigue",
-        "what", "how", "when", "where", "why", "which",
-        "you", "your", "his", "her", "can", "should",
-        "is", "are", "was", "were", "be", "been"
-    }
-    
     @staticmethod
     def detect_language(text: str) -> Literal["pt", "en"]:
         """
@@ -69,13 +73,11 @@ class LanguageDetector:
             elif detected in ("en", "en-US", "en-GB"):
                 return "en"
             
-            # Fallback: contar palavras-chave
-            text_lower = text.lower()
+            # Fallback: contar palavras-chave (texto tokenizado uma única vez)
+            words = Counter(text.lower().split())
             
-            pt_score = sum(1 for word in text_lower.split() 
-                          if word in LanguageDetector.PORTUGUESE_MEDICAL_KEYWORDS)
-            en_score = sum(1 for word in text_lower.split() 
-                          if word in LanguageDetector.ENGLISH_MEDICAL_KEYWORDS)
+            pt_score = sum(words[word] for word in words.keys() & PORTUGUESE_MEDICAL_KEYWORDS)
+            en_score = sum(words[word] for word in words.keys() & ENGLISH_MEDICAL_KEYWORDS)
             
             logger.debug(f"Scores: PT={pt_score}, EN={en_score}")
             
@@ -92,8 +94,27 @@ class LanguageDetector:
 class Translator:
     """Traduz textos entre português e inglês usando LLM."""
     
+    # Máximo de traduções mantidas em cache (perguntas repetidas não chamam o LLM)
+    TRANSLATION_CACHE_SIZE = 2048
+    
+    PROMPTS = {
+        ("pt", "en"): """Translate the following medical question from Portuguese to English. 
+Maintain medical terminology accuracy. Return ONLY the translation, nothing else.
+
+Portuguese: {text}
+
+English:""",
+        ("en", "pt"): """Translate the following medical response from English to Portuguese (Brazilian Portuguese - pt-BR).
+Maintain medical terminology accuracy and clarity. Return ONLY the translation, nothing else.
+
+English: {text}
+
+Portuguese (pt-BR):""",
+    }
+    
     def __init__(self):
         self.llm = LLMFactory.get_llm()
+        self._cached_translation = lru_cache(maxsize=self.TRANSLATION_CACHE_SIZE)(self._request_translation)
     
     def translate_pt_to_en(self, text: str) -> str:
         """
@@ -113,18 +134,8 @@ class Translator:
         
         try:
             logger.debug(f"🔄 Traduzindo para inglês: {text[:50]}...")
-            
-            prompt = f"""Translate the following medical question from Portuguese to English. 
-Maintain medical terminology accuracy. Return ONLY the translation, nothing else.
-
-Portuguese: {text}
-
-English:"""
-            
-            response = self.llm.invoke(prompt)
-            translation = response.content if hasattr(response, 'content') else str(response)
-            translation = translation.strip() # type: ignore
-            
+            # Espaços normalizados aumentam a taxa de acerto do cache
+            translation = self._cached_translation(" ".join(text.split()), "pt", "en")
             logger.debug(f"✅ Tradução: {translation[:50]}...")
             return translation
         
@@ -150,18 +161,7 @@ English:"""
         
         try:
             logger.debug(f"🔄 Traduzindo para português: {text[:50]}...")
-            
-            prompt = f"""Translate the following medical response from English to Portuguese (Brazilian Portuguese - pt-BR).
-Maintain medical terminology accuracy and clarity. Return ONLY the translation, nothing else.
-
-English: {text}
-
-Portuguese (pt-BR):"""
-            
-            response = self.llm.invoke(prompt)
-            translation = response.content if hasattr(response, 'content') else str(response)
-            translation = translation.strip() # type: ignore
-            
+            translation = self._cached_translation(text.strip(), "en", "pt")
             logger.debug(f"✅ Tradução: {translation[:50]}...")
             return translation
         
@@ -169,6 +169,18 @@ Portuguese (pt-BR):"""
             logger.error(f"❌ Erro ao traduzir para português: {e}")
             return text  # Fallback: retornar original
     
+    def _request_translation(self, text: str, source_lang: str, target_lang: str) -> str:
+        """
+        Chama o LLM para traduzir o texto.
+        
+        Chamado através de `_cached_translation` (lru_cache); exceções não
+        são cacheadas e propagam para o método público.
+        """
+        prompt = self.PROMPTS[(source_lang, target_lang)].format(text=text)
+        response = self.llm.invoke(prompt)
+        translation = response.content if hasattr(response, 'content') else str(response)
+        return translation.strip() # type: ignore
+    
     def translate(self, text: str, source_lang: Literal["pt", "en"], 
                  target_lang: Literal["pt", "en"]) -> str:
         """
@@ -0,0 +1,75 @@
+"""
+Testes unitários para o cache de respostas e o índice semântico.
+"""
+
+from unittest.mock import Mock
+
+import numpy as np
+from langchain_core.documents import Document
+from src.infrastructure.cache_store import ResponseCache, SemanticQueryIndex, _question_fingerprint
+
+
+def _unit(values):
+    vector = np.array([values], dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_index_matches_similar_question():
+    """Vetor quase idêntico deve retornar a chave já registrada."""
+    index = SemanticQueryIndex(max_size=4)
+    index.add(_unit([1.0, 0.0, 0.0]), "medical_response:a")
+    
+    assert index.search(_unit([1.0, 0.01, 0.0])) == "medical_response:a"
+    assert index.search(_unit([0.0, 1.0, 0.0])) is None
+
+
+def test_semantic_index_evicts_least_recently_used():
+    """Ao exceder o limite, a pergunta menos usada deve ser despejada."""
+    index = SemanticQueryIndex(max_size=2)
+    index.add(_unit([1.0, 0.0, 0.0]), "a")
+    index.add(_unit([0.0, 1.0, 0.0]), "b")
+    index.search(_unit([1.0, 0.0, 0.0]))  # "a" passa a ser o mais recente
+    index.add(_unit([0.0, 0.0, 1.0]), "c")
+    
+    assert index.search(_unit([0.0, 1.0, 0.0])) is None
+    assert index.search(_unit([1.0, 0.0, 0.0])) == "a"
+
+
+def test_response_cache_round_trip_rebuilds_documents():
+    """Resposta gravada deve voltar com Documents e campos extras do estado."""
+    cache = ResponseCache()
+    cache.redis_client = Mock()
+    doc = Document(page_content="Protocolo X", metadata={"source": "0000002.xml"})
+    
+    cache.cache_response("Pergunta?", [doc], "Resposta", hallucination_check="valid")
+    cached = cache.get_cached_response("pergunta?")
+    
+    assert cached["documents"] == [doc]
+    assert cached["hallucination_check"] == "valid"
+    cache.redis_client.get.assert_not_called()  # servido pelo L1
+
+
+def test_semantic_index_requires_same_numbers():
+    """Perguntas quase idênticas com doses diferentes não compartilham resposta."""
+    index = SemanticQueryIndex(max_size=4)
+    index.add(_unit([1.0, 0.0, 0.0]), "a", _question_fingerprint("Dose de 5 mg para idosos?"))
+    
+    assert index.search(_unit([1.0, 0.0, 0.0]), _question_fingerprint("Dose de 50 mg para idosos?")) is None
+    assert index.search(_unit([1.0, 0.0, 0.0]), _question_fingerprint("dose de 5 mg para idosos")) == "a"
+
+
+def test_invalidate_keeps_entries_outside_pattern():
+    """Invalidar um padrão não deve esvaziar L1 nem índice semântico para as demais chaves."""
+    cache = ResponseCache()
+    cache.redis_client = Mock()
+    cache.redis_client.scan_iter.return_value = []
+    cache._l1["medical_response:old-model:a"] = {"documents": [], "generation": "A"}
+    cache._l1["medical_response:new-model:b"] = {"documents": [], "generation": "B"}
+    cache._semantic_index.add(_unit([1.0, 0.0, 0.0]), "medical_response:old-model:a")
+    cache._semantic_index.add(_unit([0.0, 1.0, 0.0]), "medical_response:new-model:b")
+    
+    cache.invalidate("old-model:*")
+    
+    assert list(cache._l1) == ["medical_response:new-model:b"]
+    assert cache._semantic_index.search(_unit([1.0, 0.0, 0.0])) is None
+    assert cache._semantic_index.search(_unit([0.0, 1.0, 0.0])) == "medical_response:new-model:b"
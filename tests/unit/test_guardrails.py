@@ -0,0 +1,84 @@
+"""
+Testes unitários para os guardrails de validação.
+"""
+
+import pytest
+from unittest.mock import patch
+from src.domain.guardrails import GuardrailsValidator
+
+
+@pytest.fixture
+def validator():
+    """GuardrailsValidator com LLM mockado."""
+    with patch("src.domain.guardrails.LLMFactory"):
+        yield GuardrailsValidator()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Meu CPF é 123.456.789-00", "cpf"),
+    ("CNPJ 12.345.678/0001-90", "cnpj"),
+    ("Ligue para (11) 98765-4321", "phone"),
+    ("Contato: medico@hospital.com.br", "email"),
+    ("Paciente Silva apresenta febre", "patient_name"),
+])
+def test_detect_pii_returns_type(validator, text, expected):
+    """Deve identificar o tipo de PII presente no texto."""
+    assert validator._detect_pii(text) == expected
+
+
+def test_detect_pii_without_sensitive_data(validator):
+    """Não deve sinalizar pergunta sem dados pessoais."""
+    assert validator._detect_pii("Qual é o protocolo para sepse em pacientes idosos?") is None
+
+
+def test_relevance_cached_for_normalized_question(validator):
+    """Perguntas equivalentes (caixa/espaços) devem reutilizar a resposta do LLM."""
+    validator.llm.invoke.return_value = "sim"
+    
+    assert validator._is_medically_relevant("Qual o protocolo para pacientes idosos?") is True
+    assert validator._is_medically_relevant("  qual o protocolo para PACIENTES idosos?  ") is True
+    
+    validator.llm.invoke.assert_called_once()
+
+
+def test_relevance_error_is_permissive_and_not_cached(validator):
+    """Erros do LLM não devem ser cacheados e a pergunta é aceita."""
+    validator.llm.invoke.side_effect = [RuntimeError("timeout"), "não"]
+    
+    assert validator._is_medically_relevant("Receita de bolo") is True
+    assert validator._is_medically_relevant("Receita de bolo") is False
+
+
+def test_relevance_fast_path_skips_llm(validator):
+    """Termo clínico inequívoco deve aprovar a pergunta sem chamar o LLM."""
+    assert validator._is_medically_relevant("Qual a dose de insulina para idosos?") is True
+    
+    validator.llm.invoke.assert_not_called()
+
+
+def test_precheck_decides_locally_when_possible(validator):
+    """PII e termos clínicos são decididos sem LLM; pergunta ambígua retorna None."""
+    assert validator.precheck("Contato: medico@hospital.com.br").has_pii is True
+    assert validator.precheck("Qual a dose de insulina para idosos?").is_valid is True
+    assert validator.precheck("Qual o protocolo para pacientes idosos?") is None
+    
+    validator.llm.invoke.assert_not_called()
+
+
+def test_relevance_prompt_keeps_original_casing(validator):
+    """Chave do cache é normalizada, mas o LLM recebe siglas com a caixa original."""
+    validator.llm.invoke.return_value = "sim"
+    
+    validator._is_medically_relevant("Quais os efeitos do AIDS em idosos?")
+    
+    assert "AIDS" in validator.llm.invoke.call_args.args[0]
+
+
+def test_ambiguous_term_still_asks_llm(validator):
+    """Termos com uso não clínico (ex: signo "câncer") não dispensam o LLM."""
+    validator.llm.invoke.return_value = "não"
+    
+    assert validator._is_medically_relevant("cancer horoscope today") is False
+    assert validator.precheck("Previsão do signo de câncer hoje") is None
+    
+    validator.llm.invoke.assert_called_once()
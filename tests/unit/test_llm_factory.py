@@ -0,0 +1,47 @@
+"""
+Testes unitários para o cache de embeddings de consultas.
+"""
+
+from unittest.mock import Mock
+from src.config import settings
+from src.infrastructure.llm_factory import CachedQueryEmbeddings, LLMFactory
+
+
+def test_query_embedding_reused_for_whitespace_variants():
+    """Consultas iguais (a menos de espaços) devem chamar o modelo uma única vez."""
+    model = Mock()
+    model.embed_query.return_value = [0.1, 0.2]
+    embeddings = CachedQueryEmbeddings(model)
+    
+    first = embeddings.embed_query("sepse em idosos")
+    first.append(9.9)  # alterar o retorno não pode afetar o cache
+    
+    assert embeddings.embed_query("  sepse   em idosos ") == [0.1, 0.2]
+    model.embed_query.assert_called_once_with("sepse em idosos")
+    assert embeddings.cache_info()[:2] == (1, 1)
+
+
+def test_document_embeddings_bypass_cache():
+    """Embeddings de documentos devem sempre ir ao modelo."""
+    model = Mock()
+    model.embed_documents.return_value = [[0.1], [0.2]]
+    embeddings = CachedQueryEmbeddings(model)
+    
+    embeddings.embed_documents(["a", "b"])
+    embeddings.embed_documents(["a", "b"])
+    
+    assert model.embed_documents.call_count == 2
+
+
+def test_ingestion_embeddings_do_not_share_the_singleton_client(monkeypatch):
+    """Cada asyncio.run da ingestão deve receber um cliente novo, nunca o da CLI."""
+    monkeypatch.setattr(settings, "embedding_provider", "google")
+    monkeypatch.setattr(LLMFactory, "_create_embeddings_model", classmethod(lambda cls: Mock()))
+    LLMFactory.reset()
+    
+    shared = LLMFactory.get_embeddings()
+    first = LLMFactory.create_ingestion_embeddings()
+    
+    assert first is not shared.embeddings
+    assert LLMFactory.create_ingestion_embeddings() is not first
+    LLMFactory.reset()
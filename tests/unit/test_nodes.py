@@ -2,10 +2,12 @@
 Testes unitários para os nós do grafo RAG.
 """
 
+import asyncio
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+from langchain_core.documents import Document
 from src.domain.state import AgentState
-from src.use_cases.nodes import RAGNodes
+from src.use_cases.nodes import RAGNodes, _context_preview
 
 
 @pytest.fixture
@@ -55,4 +57,38 @@ def test_retrieve_documents(rag_nodes, mock_retriever):
     result = rag_nodes.retrieve(state)
     
     assert len(result["documents"]) == 1
-    mock_retriever.invoke.assert_called_once()
\ No newline at end of file
+    mock_retriever.invoke.assert_called_once()
+
+def test_dedupe_documents_keeps_first_occurrence():
+    """Documentos com o mesmo conteúdo devem aparecer uma única vez, na ordem original."""
+    first = Document(page_content="Protocolo X", metadata={"source": "a.xml"})
+    duplicate = Document(page_content="Protocolo X", metadata={"source": "b.xml"})
+    other = Document(page_content="Protocolo Y")
+    
+    assert RAGNodes._dedupe_documents([first, duplicate, other]) == [first, other]
+
+
+def test_cosine_similarities_against_each_row():
+    """Similaridade calculada por linha; vetor nulo não gera divisão por zero."""
+    similarities = RAGNodes._cosine_similarities([1.0, 0.0], [[2.0, 0.0], [0.0, 3.0], [0.0, 0.0]])
+    
+    assert similarities.tolist() == pytest.approx([1.0, 0.0, 0.0])
+
+
+def test_context_preview_cuts_at_word_boundary():
+    """Trecho longo termina em palavra inteira; trecho curto segue sem reticências."""
+    assert _context_preview("febre alta persistente", limit=12) == "febre alta..."
+    assert _context_preview("  febre alta  ", limit=12) == "febre alta"
+
+
+def test_semantic_validation_error_falls_back_to_keywords(rag_nodes):
+    """Falha nos embeddings não pode aprovar a resposta: decide a validação por palavras-chave."""
+    rag_nodes.embeddings = Mock(aembed_query=AsyncMock(side_effect=RuntimeError("Event loop is closed")))
+    state = {
+        "generation": "Receita de bolo de chocolate com cobertura",
+        "documents": [Document(page_content="Protocolo de sepse: antibioticoterapia precoce em idosos")],
+    }
+    
+    result = asyncio.run(rag_nodes.validate_hallucination(state))
+    
+    assert result["hallucination_check"] == "possible_hallucination"
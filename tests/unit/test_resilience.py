@@ -0,0 +1,19 @@
+"""
+Testes unitários para as políticas de retry.
+"""
+
+from google.genai.errors import ClientError, ServerError
+from src.infrastructure.resilience import _is_rate_limited, _is_transient
+
+
+def test_rate_limit_and_unavailable_are_retried():
+    """429 e 503 do SDK google-genai devem disparar retentativa."""
+    assert _is_rate_limited(ClientError(429, {}))
+    assert _is_rate_limited(ServerError(503, {}))
+    assert _is_transient(TimeoutError())
+
+
+def test_permanent_errors_are_not_retried():
+    """Erros de requisição (ex: 400, chave inválida) falham imediatamente."""
+    assert not _is_rate_limited(ClientError(400, {}))
+    assert not _is_transient(ValueError("entrada inválida"))
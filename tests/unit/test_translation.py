@@ -0,0 +1,33 @@
+"""
+Testes unitários para tradução e detecção de idioma.
+"""
+
+import pytest
+from unittest.mock import patch
+from src.utils.translation import Translator
+
+
+@pytest.fixture
+def translator():
+    """Translator com LLM mockado."""
+    with patch("src.utils.translation.LLMFactory"):
+        yield Translator()
+
+
+def test_translation_is_cached(translator):
+    """Mesma pergunta (com espaços diferentes) deve chamar o LLM uma única vez."""
+    translator.llm.invoke.return_value = "What is the treatment for sepsis?"
+    
+    first = translator.translate("Qual o tratamento para sepse?", "pt", "en")
+    second = translator.translate("  Qual o  tratamento para sepse? ", "pt", "en")
+    
+    assert first == second == "What is the treatment for sepsis?"
+    translator.llm.invoke.assert_called_once()
+
+
+def test_translation_error_returns_original(translator):
+    """Falha do LLM deve devolver o texto original sem cachear o erro."""
+    translator.llm.invoke.side_effect = [RuntimeError("quota"), "Fever"]
+    
+    assert translator.translate("Febre", "pt", "en") == "Febre"
+    assert translator.translate("Febre", "pt", "en") == "Fever"
@@ -0,0 +1,73 @@
+"""
+Testes unitários para o índice FAISS derivado da coleção Chroma.
+"""
+
+from typing import List
+from unittest.mock import Mock
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from src.config import settings
+from src.infrastructure.vector_store import VectorStoreRepository
+
+DOCUMENTS = ["Sepsis protocol", "Asthma protocol", "Diabetes protocol"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Um eixo por tema: ranking previsível sem chamar a API de embeddings."""
+
+    AXES = ("sepsis", "asthma", "diabetes")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        lowered = text.lower()
+        return [lowered.count(axis) + 0.1 for axis in self.AXES]
+
+
+def _faiss_repository(tmp_path, monkeypatch, quantization: str = "none") -> VectorStoreRepository:
+    """Repositório com backend FAISS sobre uma coleção Chroma simulada."""
+    monkeypatch.setattr(settings, "vector_backend", "faiss")
+    monkeypatch.setattr(settings, "faiss_quantization", quantization)
+    embeddings = KeywordEmbeddings()
+
+    repository = VectorStoreRepository()
+    repository.db_path = tmp_path
+    repository.embeddings = embeddings
+    repository.vector_store = Mock()
+    repository.vector_store._collection.get.return_value = {
+        "ids": [f"id-{i}" for i in range(len(DOCUMENTS))],
+        "documents": DOCUMENTS,
+        "metadatas": [{"source": f"{i}.xml"} for i in range(len(DOCUMENTS))],
+        "embeddings": embeddings.embed_documents(DOCUMENTS),
+    }
+    return repository
+
+
+@pytest.mark.parametrize("quantization", ["none", "fp16", "int8"])
+def test_faiss_index_keeps_ranking_after_reload(tmp_path, monkeypatch, quantization):
+    """Índice recarregado do disco deve pontuar como o recém-construído (cosseno), em todo modo."""
+    repository = _faiss_repository(tmp_path, monkeypatch, quantization)
+    built = repository._initialize_retrieval_store()
+    reloaded = repository._initialize_retrieval_store()
+
+    assert isinstance(reloaded, FAISS) and reloaded is not built
+    for store in (built, reloaded):
+        (best, best_score), *others = store.similarity_search_with_relevance_scores("sepsis treatment", k=3)
+        assert best.page_content == "Sepsis protocol"
+        assert all(best_score > score for _, score in others)
+
+
+def test_faiss_score_threshold_keeps_best_passages(tmp_path, monkeypatch):
+    """Com RETRIEVAL_SCORE_THRESHOLD, o índice recarregado deve manter o mais relevante e descartar o resto."""
+    repository = _faiss_repository(tmp_path, monkeypatch, "int8")
+    repository._initialize_retrieval_store()
+    repository.retrieval_store = repository._initialize_retrieval_store()  # recarregado do disco
+    monkeypatch.setattr(settings, "retrieval_k", 3)
+    monkeypatch.setattr(settings, "retrieval_score_threshold", 0.5)
+
+    documents = repository.get_retriever().invoke("sepsis treatment")
+
+    assert [doc.page_content for doc in documents] == ["Sepsis protocol"]